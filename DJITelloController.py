@@ -1,32 +1,187 @@
 import sys
-import cv2
-import numpy as np
-import mediapipe as mp
-from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QGridLayout, QHBoxLayout, QSizePolicy
-from PyQt5.QtGui import QImage, QPixmap, QIcon
-from PyQt5.QtCore import QTimer
+import time
+
+# Начало запуска для отчета о времени старта (startup.StartupTimer)
+STARTED = time.perf_counter()
+
+from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QGridLayout, QHBoxLayout
+from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import QTimer, Qt
 from djitellopy import Tello
 
+from commands import CommandDispatcher, PRIORITY_NORMAL, PRIORITY_URGENT
+from face_follow import FaceFollower
+from gestures import GESTURE_COMMANDS
+from pipeline import VisionPipeline
+from profiling import StageProfiler
+from rc_control import RcController
+from recording import VideoRecorder
+from startup import BackgroundLoader, StartupTimer
+from telemetry import TelemetryMonitor, TelemetryRecorder, TelemetryRingBuffer
+from telemetry_plot import TelemetryPlot
+from video_ingest import TelloFrameSource, UdpH264Source
+from video_widget import VideoLabel
+from vision import FrameProcessor
+
+# Распознавание лиц и жестов; выключенные модели не загружаются (остаются видео и ручное управление).
+# Включенные модели загружаются в фоне после показа окна
+FACE_DETECTION = True
+HAND_GESTURES = True
+
+# Цель по времени от запуска до показа окна, с. Отчет: python DJITelloController.py --startup-report
+STARTUP_TARGET = 1.0
+
+# Детектор лиц: 'haar', 'dnn' (OpenCV DNN, нужны файлы модели в models/) или 'mediapipe'
+FACE_DETECTOR_BACKEND = 'haar'
+
+# Процессы для MediaPipe Hands: 0 - в потоке конвейера, N - пул из N процессов (inference.py)
+HANDS_WORKERS = 0
+
+# Настройки MediaPipe Hands (см. vision.HANDS_SETTINGS) и бюджет времени на кадр в пуле процессов, с:
+# при превышении пул переходит на более легкие настройки
+HANDS_OPTIONS = {'model_complexity': 1, 'max_num_hands': 2}
+HANDS_LATENCY_BUDGET = 0.05
+
+# Искать руки только в области вокруг прошлых рук и лиц (весь кадр - периодически)
+HAND_ROI = True
+
+# Запись видео: размеченные кадры (True) или исходные с дрона (False), частота файла, к/с
+RECORD_ANNOTATED = True
+RECORD_FPS = 30
+# Трансляция во время записи через ffmpeg, например 'udp://192.168.1.5:5000' или 'rtsp://host:8554/tello'
+STREAM_URL = None
+
+# Прием видео: 'djitellopy' (get_frame_read) или 'udp' (свой декодер H.264 с низкой задержкой)
+VIDEO_INGEST = 'djitellopy'
+
+# Кадры старше этого времени (с) не обрабатываются
+MAX_FRAME_AGE = 0.5
+
+# Частота обновления меток телеметрии, Гц
+TELEMETRY_UI_HZ = 5
+
+# Скорость в режиме RC (от -100 до 100)
+RC_SPEED = 40
+
+# Жест -> скорости (влево/вправо, вперед/назад, вверх/вниз, поворот) в режиме RC
+RC_GESTURE_VELOCITIES = {
+    'fist': (0, 0, 0, RC_SPEED),
+    'index_up': (0, 0, RC_SPEED, 0),
+    'index_down': (0, 0, -RC_SPEED, 0),
+    'forward': (0, RC_SPEED, 0, 0),
+    'back': (0, -RC_SPEED, 0, 0),
+    'left': (-RC_SPEED, 0, 0, 0),
+    'right': (RC_SPEED, 0, 0, 0),
+}
+
+# Клавиша -> скорости в режиме RC
+RC_KEY_VELOCITIES = {
+    Qt.Key_W: (0, RC_SPEED, 0, 0),
+    Qt.Key_S: (0, -RC_SPEED, 0, 0),
+    Qt.Key_A: (-RC_SPEED, 0, 0, 0),
+    Qt.Key_D: (RC_SPEED, 0, 0, 0),
+    Qt.Key_Up: (0, 0, RC_SPEED, 0),
+    Qt.Key_Down: (0, 0, -RC_SPEED, 0),
+    Qt.Key_Left: (0, 0, 0, -RC_SPEED),
+    Qt.Key_Right: (0, 0, 0, RC_SPEED),
+}
+
 class TelloApp(QWidget):
-    def __init__(self):
+    def __init__(self, startup=None):
         super().__init__()
+        self.startup = startup if startup is not None else StartupTimer()
         self.initUI()
         self.tello = Tello()
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
 
-        # Загрузка распознавания лиц
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        # Команды дрону выполняются в отдельном потоке, результат приходит сигналами
+        self.dispatcher = CommandDispatcher(self.tello)
+        self.dispatcher.command_finished.connect(self.on_command_finished)
+        self.dispatcher.command_failed.connect(self.on_command_failed)
+
+        # Непрерывное управление скоростями (режим RC)
+        self.rc = RcController(self.tello)
 
-        # Инициализация MediaPipe
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands()
-        self.mp_draw = mp.solutions.drawing_utils
+        # Следование за лицом: ПИД по рамке лица -> скорости RC (источник 'follow')
+        self.follower = FaceFollower(self.rc)
+        # Щелчок по видео выбирает лицо для следования
+        self.video_label.clicked.connect(self.follower.select)
+        self.pressed_keys = set()
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.update_frame)
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.update_pipeline_stats)
+
+        # Телеметрия приходит пакетами состояния, метки обновляются с низкой частотой
+        self.telemetry = TelemetryMonitor(self.tello.get_current_state)
+        self.telemetry_ring = TelemetryRingBuffer()
+        self.telemetry.add_listener(self.telemetry_ring.append)
+        self.telemetry_recorder = None
+        self.plot_timer = QTimer()
+        self.plot_timer.timeout.connect(self.update_telemetry_plot)
+        self.telemetry_seq = 0
+        self.label_texts = {}
+        self.telemetry_timer = QTimer()
+        self.telemetry_timer.timeout.connect(self.update_sensor_data)
+
+        # Профилирование стадий обработки кадра (по умолчанию выключено)
+        self.profiler = StageProfiler()
+
+        # Распознавание лиц и жестов работает в отдельном потоке конвейера. Пока модели
+        # загружаются (load_vision), конвейер только показывает видео
+        self.video_source = None
+        self.pipeline = VisionPipeline(self.read_frame, FrameProcessor(None, profiler=self.profiler, hands=False),
+                                       profiler=self.profiler, max_frame_age=MAX_FRAME_AGE)
+        self.vision_loader = None
+
+        # Запись и трансляция видео кодируются в своем потоке
+        self.video_recorder = None
+        self.pipeline.add_frame_listener(self.record_raw_frame)
 
         # Установка начальной темы
         self.current_theme = 'light'
         self.set_light_theme()
 
+    def on_window_shown(self):
+        self.startup.mark('window_shown')
+        self.load_vision()
+
+    def load_vision(self):
+        if not (FACE_DETECTION or HAND_GESTURES):
+            self.on_startup_finished()
+            return
+        self.vision_loader = BackgroundLoader(self.create_processor, self)
+        self.vision_loader.loaded.connect(self.on_vision_loaded)
+        self.vision_loader.failed.connect(self.on_vision_failed)
+        self.vision_loader.start()
+
+    def create_processor(self):
+        # Выполняется в потоке загрузки
+        face_backend = FACE_DETECTOR_BACKEND if FACE_DETECTION else None
+        if HAND_GESTURES and HANDS_WORKERS:
+            from inference import PooledFrameProcessor
+            processor = PooledFrameProcessor(face_backend, profiler=self.profiler, hands_settings=HANDS_OPTIONS,
+                                             workers=HANDS_WORKERS, latency_budget=HANDS_LATENCY_BUDGET)
+            # В конвейер процессор попадает, когда процессы уже загрузили модели
+            processor.wait_ready()
+            return processor
+        return FrameProcessor(face_backend, profiler=self.profiler, hands_settings=HANDS_OPTIONS,
+                              hand_roi=HAND_ROI, hands=HAND_GESTURES)
+
+    def on_vision_loaded(self, processor):
+        self.pipeline.set_processor(processor)
+        self.startup.mark('vision_loaded')
+        self.on_startup_finished()
+
+    def on_vision_failed(self, message):
+        self.temp_label.setText(f'Ошибка загрузки распознавания: {message}')
+        self.on_startup_finished()
+
+    def on_startup_finished(self):
+        if '--startup-report' in sys.argv:
+            print(self.startup.report())
+            QApplication.instance().exit(0 if self.startup.within_target() else 1)
+
     def initUI(self):
         self.setWindowTitle('Управление дроном Tello')
         self.setGeometry(100, 100, 800, 600)
@@ -36,7 +191,7 @@ class TelloApp(QWidget):
 
         self.layout = QVBoxLayout()
 
-        self.video_label = QLabel('Видеопоток')
+        self.video_label = VideoLabel('Видеопоток')
         self.layout.addWidget(self.video_label)
 
         info_layout = QVBoxLayout()
@@ -58,8 +213,14 @@ class TelloApp(QWidget):
         self.altitude_label = QLabel('Высота: ')
         info_layout.addWidget(self.altitude_label)
 
+        self.pipeline_label = QLabel('Конвейер: ')
+        info_layout.addWidget(self.pipeline_label)
+
         self.layout.addLayout(info_layout)
 
+        # График телеметрии создается при первом включении
+        self.telemetry_plot = None
+
         self.movement_layout = QGridLayout()
 
         # Установка фиксированного размера для всех кнопок
@@ -119,6 +280,16 @@ class TelloApp(QWidget):
         self.emergency_stop_button.clicked.connect(self.emergency_stop)
         control_layout.addWidget(self.emergency_stop_button)
 
+        self.rc_mode_button = QPushButton('Режим RC')
+        self.rc_mode_button.setFixedSize(*button_size)
+        self.rc_mode_button.clicked.connect(self.toggle_rc_mode)
+        control_layout.addWidget(self.rc_mode_button)
+
+        self.follow_button = QPushButton('Следование')
+        self.follow_button.setFixedSize(*button_size)
+        self.follow_button.clicked.connect(self.toggle_follow)
+        control_layout.addWidget(self.follow_button)
+
         self.theme_button = QPushButton('Сменить тему')
         self.theme_button.setFixedSize(*button_size)
         self.theme_button.clicked.connect(self.switch_theme)
@@ -126,235 +297,401 @@ class TelloApp(QWidget):
 
         self.layout.addLayout(control_layout)
 
+        tools_layout = QHBoxLayout()
+
+        self.record_telemetry_button = QPushButton('Запись телеметрии')
+        self.record_telemetry_button.setFixedSize(*button_size)
+        self.record_telemetry_button.clicked.connect(self.toggle_telemetry_recording)
+        tools_layout.addWidget(self.record_telemetry_button)
+
+        self.record_video_button = QPushButton('Запись видео')
+        self.record_video_button.setFixedSize(*button_size)
+        self.record_video_button.clicked.connect(self.toggle_video_recording)
+        tools_layout.addWidget(self.record_video_button)
+
+        self.plot_button = QPushButton('График')
+        self.plot_button.setFixedSize(*button_size)
+        self.plot_button.clicked.connect(self.toggle_telemetry_plot)
+        tools_layout.addWidget(self.plot_button)
+
+        self.profile_button = QPushButton('Профилирование')
+        self.profile_button.setFixedSize(*button_size)
+        self.profile_button.clicked.connect(self.toggle_profiling)
+        tools_layout.addWidget(self.profile_button)
+
+        self.export_profile_button = QPushButton('Экспорт профиля')
+        self.export_profile_button.setFixedSize(*button_size)
+        self.export_profile_button.clicked.connect(self.export_profile)
+        tools_layout.addWidget(self.export_profile_button)
+
+        tools_layout.addStretch()
+        self.layout.addLayout(tools_layout)
+
         self.setLayout(self.layout)
 
     def connect_to_tello(self):
         try:
             self.tello.connect()
+            self.dispatcher.start()
+            self.telemetry.start()
+            self.telemetry_timer.start(int(1000 / TELEMETRY_UI_HZ))
             self.tello.streamon()
+            if VIDEO_INGEST == 'udp':
+                self.video_source = UdpH264Source(self.tello.vs_udp_port).start()
+            else:
+                self.video_source = TelloFrameSource(self.tello)
+            self.pipeline.start()
             self.timer.start(10)  # Установите интервал на 10 мс для увеличения FPS
+            self.stats_timer.start(500)
             self.temp_label.setText('Подключено к Tello')
         except Exception as e:
             self.temp_label.setText(f'Ошибка подключения к Tello: {str(e)}')
 
     def update_frame(self):
-        frame = self.tello.get_frame_read().frame
-        if frame is not None:
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            # Преобразуем в оттенки серого для распознавания лиц
-            gray = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2GRAY)
-
-            # Обнаруживаем лица
-            faces = self.face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5)
-
-            # Определяем цвет для обводки лиц
-            color = (255, 255, 255)  # Белый цвет в формате BGR
-
-            # Обработка жестов рук
-            results = self.hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    self.mp_draw.draw_landmarks(frame_rgb, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
-
-                    # Определяем жесты
-                    thumb_tip = hand_landmarks.landmark[self.mp_hands.HandLandmark.THUMB_TIP]
-                    index_tip = hand_landmarks.landmark[self.mp_hands.HandLandmark.INDEX_FINGER_TIP]
-                    middle_tip = hand_landmarks.landmark[self.mp_hands.HandLandmark.MIDDLE_FINGER_TIP]
-                    ring_tip = hand_landmarks.landmark[self.mp_hands.HandLandmark.RING_FINGER_TIP]
-                    pinky_tip = hand_landmarks.landmark[self.mp_hands.HandLandmark.PINKY_TIP]
-
-                    # Проверка на ладонь (открытая рука)
-                    if thumb_tip.y < index_tip.y and thumb_tip.y < middle_tip.y:
-                        self.land() 
-                        self.temp_label.setText('Ладонь обнаружена: Дрон садится')
-                        break
-
-                    # Проверка на кулак (сжатая рука)
-                    if thumb_tip.y > index_tip.y and thumb_tip.y > middle_tip.y:
-                        try:
-                            self.tello.rotate_clockwise(90) 
-                            self.temp_label.setText('Кулак обнаружен: Дрон поворачивается на 90 градусов')
-                        except Exception as e:
-                            self.temp_label.setText(f'Ошибка при повороте: {str(e)}')
-                        break
-
-                    # Проверка на жест "указательный палец вверх"
-                    if (index_tip.y < thumb_tip.y and
-                        middle_tip.y > thumb_tip.y and
-                        ring_tip.y > thumb_tip.y and
-                        pinky_tip.y > thumb_tip.y):
-                        try:
-                            self.tello.move_up(20) 
-                            self.temp_label.setText('Указательный палец вверх обнаружен: Дрон летит вверх на 20 см')
-                        except Exception as e:
-                            self.temp_label.setText(f'Ошибка при движении вверх: {str(e)}')
-                        break
-
-                    # Проверка на жест "указательный палец вниз"
-                    if (index_tip.y > thumb_tip.y and
-                        middle_tip.y < thumb_tip.y and
-                        ring_tip.y > thumb_tip.y and
-                        pinky_tip.y > thumb_tip.y):
-                        try:
-                            self.tello.move_down(20)
-                            self.temp_label.setText('Указательный палец вниз обнаружен: Дрон летит вниз на 20 см')
-                        except Exception as e:
-                            self.temp_label.setText(f'Ошибка при движении вниз: {str(e)}')
-                        break
-
-                    # Проверка на жест "движение вперед"
-                    if (index_tip.y < thumb_tip.y and
-                        middle_tip.y < thumb_tip.y and
-                        ring_tip.y > thumb_tip.y and
-                        pinky_tip.y > thumb_tip.y):
-                        try:
-                            self.tello.move_forward(30)
-                            self.temp_label.setText('Движение вперед обнаружено: Дрон движется вперед на 30 см')
-                        except Exception as e:
-                            self.temp_label.setText(f'Ошибка при движении вперед: {str(e)}')
-                        break
-
-                    # Проверка на жест "движение назад"
-                    if (index_tip.y > thumb_tip.y and
-                        middle_tip.y > thumb_tip.y and
-                        ring_tip.y < thumb_tip.y and
-                        pinky_tip.y < thumb_tip.y):
-                        try:
-                            self.tello.move_back(30)
-                            self.temp_label.setText('Движение назад обнаружено: Дрон движется назад на 30 см')
-                        except Exception as e:
-                            self.temp_label.setText(f'Ошибка при движении назад: {str(e)}')
-                        break
-
-                    # Проверка на жест "движение влево"
-                    if (index_tip.x < thumb_tip.x and
-                        middle_tip.x < thumb_tip.x and
-                        ring_tip.x > thumb_tip.x and
-                        pinky_tip.x > thumb_tip.x):
-                        try:
-                            self.tello.move_left(30)
-                            self.temp_label.setText('Движение влево обнаружено: Дрон движется влево на 30 см')
-                        except Exception as e:
-                            self.temp_label.setText(f'Ошибка при движении влево: {str(e)}')
-                        break
-
-                    # Проверка на жест "движение вправо"
-                    if (index_tip.x > thumb_tip.x and
-                        middle_tip.x > thumb_tip.x and
-                        ring_tip.x < thumb_tip.x and
-                        pinky_tip.x < thumb_tip.x):
-                        try:
-                            self.tello.move_right(30)
-                            self.temp_label.setText('Движение вправо обнаружено: Дрон движется вправо на 30 см')
-                        except Exception as e:
-                            self.temp_label.setText(f'Ошибка при движении вправо: {str(e)}')
-                        break
-
-            # Обводим лица
-            for (x, y, w, h) in faces:
-                cv2.rectangle(frame_rgb, (x, y), (x + w, y + h), color, 2)  
-                cv2.putText(frame_rgb, 'Лицо', (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-
-            h, w, ch = frame_rgb.shape
-            bytes_per_line = ch * w
-            q_img = QImage(frame_rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            self.video_label.setPixmap(QPixmap.fromImage(q_img))
-
-            # Обновляем информацию о состоянии дрона
-            self.update_sensor_data()
+        result = self.pipeline.poll_result()
+        if result is not None:
+            self.handle_gesture(result.gesture, result.gesture_event)
+            if self.follower.active:
+                self.follower.update_detection(result.faces, result.image.shape, result.timestamp)
+
+            with self.profiler.stage('display'):
+                self.video_label.set_frame(result.image)
+
+            if self.video_recorder is not None and RECORD_ANNOTATED:
+                self.video_recorder.submit(result.image, result.timestamp)
+
+        if self.video_recorder is not None and self.video_recorder.error is not None:
+            self.temp_label.setText(f'Ошибка записи видео: {str(self.video_recorder.error)}')
+            self.toggle_video_recording()
+
+        if self.pipeline.error is not None:
+            self.temp_label.setText(f'Ошибка обработки кадра: {str(self.pipeline.error)}')
+            self.pipeline.error = None
+
+    def update_pipeline_stats(self):
+        if self.profiler.enabled:
+            # p50 / p95 / p99 по стадиям поверх видео
+            self.video_label.hud_lines = self.profiler.hud_lines()
+            self.video_label.update()
+
+        stats = self.pipeline.snapshot()
+        self.pipeline_label.setText(
+            f'Конвейер: захват {stats["capture_fps"]:.1f} к/с | '
+            f'обработка {stats["inference_fps"]:.1f} к/с '
+            f'(очередь {stats["frame_queue"]}, пропущено {stats["frame_dropped"]}, '
+            f'устаревших {stats["stale_dropped"]}) | '
+            f'отрисовка {stats["render_fps"]:.1f} к/с '
+            f'(очередь {stats["result_queue"]}, пропущено {stats["result_dropped"]})'
+        )
+
+    def toggle_profiling(self):
+        self.profiler.enabled = not self.profiler.enabled
+        if self.profiler.enabled:
+            self.profiler.reset()
+            self.profile_button.setText('Выкл. профилирование')
+        else:
+            self.video_label.hud_lines = []
+            self.video_label.update()
+            self.profile_button.setText('Профилирование')
+
+    def export_profile(self):
+        if not self.profiler.samples:
+            self.temp_label.setText('Нет данных профилирования: включите профилирование')
+            return
+        path = time.strftime('profile_%Y%m%d_%H%M%S')
+        try:
+            self.profiler.export_csv(path + '.csv')
+            self.profiler.export_json(path + '.json')
+        except OSError as e:
+            self.temp_label.setText(f'Ошибка экспорта профиля: {str(e)}')
+            return
+        self.temp_label.setText(f'Профиль сохранен: {path}.csv, {path}.json')
+
+    def handle_gesture(self, gesture, gesture_event):
+        # В режиме RC скорость задает удерживаемый жест, в пошаговом режиме
+        # команда отправляется один раз при подтверждении жеста
+        if self.rc.active and gesture in RC_GESTURE_VELOCITIES:
+            self.rc.set_target('gestures', *RC_GESTURE_VELOCITIES[gesture])
+            return
+        self.rc.clear('gestures')
+
+        gesture = gesture_event
+        if gesture is None:
+            return
+
+        if gesture == 'palm':
+            self.stop_follow()
+            self.rc.clear()
+            self.dispatcher.submit('land', 'land', priority=PRIORITY_URGENT,
+                                   message='Ладонь обнаружена: Дрон садится', error_message='Ошибка при посадке')
+            return
+
+        command, value, message, error_message = GESTURE_COMMANDS[gesture]
+        self.dispatcher.submit(command, command, value, message=message, error_message=error_message)
+
+    def read_frame(self):
+        if self.video_source is None:
+            return None
+        return self.video_source.read_timed()
 
     def update_sensor_data(self):
-        self.get_pitch()
-        self.get_barometer()
-        self.get_distance()
-        self.get_battery()
-        self.get_altitude()
+        # Метки обновляются из кэшированного снимка телеметрии и только при новом пакете
+        snapshot = self.telemetry.latest
+        if snapshot.seq == self.telemetry_seq:
+            return
+        self.telemetry_seq = snapshot.seq
+
+        with self.profiler.stage('telemetry'):
+            self.get_pitch(snapshot)
+            self.get_barometer(snapshot)
+            self.get_distance(snapshot)
+            self.get_battery(snapshot)
+            self.get_altitude(snapshot)
+
+    def toggle_telemetry_recording(self):
+        if self.telemetry_recorder is not None:
+            self.telemetry_recorder.stop()
+            self.temp_label.setText(f'Телеметрия сохранена: {self.telemetry_recorder.path} '
+                                    f'({self.telemetry_recorder.written} записей)')
+            self.telemetry_recorder = None
+            self.record_telemetry_button.setText('Запись телеметрии')
+            return
+
+        path = time.strftime('telemetry_%Y%m%d_%H%M%S.tlm')
+        try:
+            recorder = TelemetryRecorder(self.telemetry_ring, path)
+            recorder.start()
+        except OSError as e:
+            self.temp_label.setText(f'Ошибка записи телеметрии: {str(e)}')
+            return
+        self.telemetry_recorder = recorder
+        self.record_telemetry_button.setText('Остановить запись')
+        self.temp_label.setText(f'Запись телеметрии: {path}')
+
+    def record_raw_frame(self, frame):
+        # Поток захвата: исходный BGR-кадр с дрона
+        recorder = self.video_recorder
+        if recorder is not None and not RECORD_ANNOTATED:
+            recorder.submit(frame.image, frame.timestamp, rgb=False)
+
+    def toggle_video_recording(self):
+        if self.video_recorder is not None:
+            recorder = self.video_recorder
+            self.video_recorder = None
+            recorder.stop()
+            if recorder.error is None:
+                self.temp_label.setText(f'Видео сохранено: {recorder.path} '
+                                        f'({recorder.written} кадров, пропущено {recorder.dropped})')
+            self.record_video_button.setText('Запись видео')
+            return
+
+        path = time.strftime('video_%Y%m%d_%H%M%S.mp4')
+        try:
+            recorder = VideoRecorder(path, STREAM_URL, fps=RECORD_FPS, get_telemetry=lambda: self.telemetry.latest)
+            recorder.start()
+        except (OSError, ValueError) as e:
+            self.temp_label.setText(f'Ошибка записи видео: {str(e)}')
+            return
+        self.video_recorder = recorder
+        self.record_video_button.setText('Остановить видео')
+        self.temp_label.setText(f'Запись видео: {path}')
+
+    def toggle_telemetry_plot(self):
+        if self.telemetry_plot is None:
+            self.telemetry_plot = TelemetryPlot(self.telemetry_ring)
+            self.layout.insertWidget(self.layout.indexOf(self.video_label) + 1, self.telemetry_plot)
+            self.telemetry_plot.hide()
+
+        if self.telemetry_plot.isVisible():
+            self.telemetry_plot.hide()
+            self.plot_timer.stop()
+        else:
+            self.telemetry_plot.show()
+            self.plot_timer.start(100)
+
+    def update_telemetry_plot(self):
+        self.telemetry_plot.refresh()
 
-    def get_pitch(self):
-        pitch = self.tello.get_pitch()
-        self.pitch_label.setText(f'Угол наклона: {pitch}')
+    def set_label_text(self, label, text):
+        # setText вызывается только если текст действительно изменился
+        if self.label_texts.get(label) != text:
+            self.label_texts[label] = text
+            label.setText(text)
 
-    def get_barometer(self):
-        barometer = self.tello.get_barometer()
-        self.barometer_label.setText(f'Барометр: {barometer}')
+    def get_pitch(self, snapshot):
+        pitch = snapshot.get('pitch')
+        self.set_label_text(self.pitch_label, f'Угол наклона: {pitch:.0f}')
 
-    def get_distance(self):
-        distance = self.tello.get_distance_tof()
-        self.distance_label.setText(f'Расстояние от старта: {distance} м')
+    def get_barometer(self, snapshot):
+        barometer = snapshot.get('baro') * 100
+        self.set_label_text(self.barometer_label, f'Барометр: {barometer:.0f}')
 
-    def get_battery(self):
-        battery = self.tello.get_battery()
-        self.battery_label.setText(f'Батарея: {battery}%')
+    def get_distance(self, snapshot):
+        distance = snapshot.get('tof')
+        self.set_label_text(self.distance_label, f'Расстояние от старта: {distance:.0f} м')
 
-    def get_altitude(self):
-        altitude = self.tello.get_height()
-        self.altitude_label.setText(f'Высота: {altitude} см')
+    def get_battery(self, snapshot):
+        battery = snapshot.get('bat')
+        self.set_label_text(self.battery_label, f'Батарея: {battery:.0f}%')
+
+    def get_altitude(self, snapshot):
+        altitude = snapshot.get('h')
+        self.set_label_text(self.altitude_label, f'Высота: {altitude:.0f} см')
 
     def takeoff(self):
-        try:
-            self.tello.takeoff()
-            self.temp_label.setText('Дрон взлетел')
-        except Exception as e:
-            self.temp_label.setText(f'Ошибка при взлете: {str(e)}')
+        self.dispatcher.submit('takeoff', 'takeoff', priority=PRIORITY_NORMAL,
+                               message='Дрон взлетел', error_message='Ошибка при взлете')
 
     def land(self):
-        try:
-            self.tello.land()
-            self.temp_label.setText('Дрон приземляется')
-        except Exception as e:
-            self.temp_label.setText(f'Ошибка при посадке: {str(e)}')
+        self.stop_follow()
+        self.rc.clear()
+        self.dispatcher.submit('land', 'land', priority=PRIORITY_URGENT,
+                               message='Дрон приземляется', error_message='Ошибка при посадке')
 
     def emergency_stop(self):
-        try:
-            self.tello.land()
-            self.temp_label.setText('Экстренная посадка активирована')
-        except Exception as e:
-            self.temp_label.setText(f'Ошибка при экстренной посадке: {str(e)}')
+        self.stop_follow()
+        self.rc.clear()
+        self.dispatcher.submit('land', 'land', priority=PRIORITY_URGENT,
+                               message='Экстренная посадка активирована', error_message='Ошибка при экстренной посадке')
 
     def move_forward(self):
-        try:
-            self.tello.move_forward(30)
-            self.temp_label.setText('Движение вперед')
-        except Exception as e:
-            self.temp_label.setText(f'Ошибка при движении вперед: {str(e)}')
+        if self.rc.active:
+            self.rc.set_target('buttons', forward_backward=RC_SPEED)
+            return
+        self.dispatcher.submit('move_forward', 'move_forward', 30,
+                               message='Движение вперед', error_message='Ошибка при движении вперед')
 
     def move_back(self):
-        try:
-            self.tello.move_back(30)
-            self.temp_label.setText('Движение назад')
-        except Exception as e:
-            self.temp_label.setText(f'Ошибка при движении назад: {str(e)}')
+        if self.rc.active:
+            self.rc.set_target('buttons', forward_backward=-RC_SPEED)
+            return
+        self.dispatcher.submit('move_back', 'move_back', 30,
+                               message='Движение назад', error_message='Ошибка при движении назад')
 
     def move_left(self):
-        try:
-            self.tello.move_left(30)
-            self.temp_label.setText('Движение влево')
-        except Exception as e:
-            self.temp_label.setText(f'Ошибка при движении влево: {str(e)}')
+        if self.rc.active:
+            self.rc.set_target('buttons', left_right=-RC_SPEED)
+            return
+        self.dispatcher.submit('move_left', 'move_left', 30,
+                               message='Движение влево', error_message='Ошибка при движении влево')
 
     def move_right(self):
-        try:
-            self.tello.move_right(30)
-            self.temp_label.setText('Движение вправо')
-        except Exception as e:
-            self.temp_label.setText(f'Ошибка при движении вправо: {str(e)}')
+        if self.rc.active:
+            self.rc.set_target('buttons', left_right=RC_SPEED)
+            return
+        self.dispatcher.submit('move_right', 'move_right', 30,
+                               message='Движение вправо', error_message='Ошибка при движении вправо')
 
     def move_up(self):
-        try:
-            self.tello.move_up(30)
-            self.temp_label.setText('Движение вверх')
-        except Exception as e:
-            self.temp_label.setText(f'Ошибка при движении вверх: {str(e)}')
+        if self.rc.active:
+            self.rc.set_target('buttons', up_down=RC_SPEED)
+            return
+        self.dispatcher.submit('move_up', 'move_up', 30,
+                               message='Движение вверх', error_message='Ошибка при движении вверх')
 
     def move_down(self):
-        try:
-            self.tello.move_down(30)
-            self.temp_label.setText('Движение вниз')
-        except Exception as e:
-            self.temp_label.setText(f'Ошибка при движении вниз: {str(e)}')
+        if self.rc.active:
+            self.rc.set_target('buttons', up_down=-RC_SPEED)
+            return
+        self.dispatcher.submit('move_down', 'move_down', 30,
+                               message='Движение вниз', error_message='Ошибка при движении вниз')
+
+    def toggle_rc_mode(self):
+        if self.rc.active:
+            self.stop_follow()
+            self.rc.stop()
+            self.pressed_keys.clear()
+            self.rc_mode_button.setText('Режим RC')
+            self.temp_label.setText('Пошаговое управление')
+        elif not self.dispatcher.running:
+            self.temp_label.setText('Ошибка включения режима RC: нет подключения к Tello')
+            return
+        else:
+            self.dispatcher.cancel_pending()
+            self.rc.start()
+            self.rc_mode_button.setText('Пошаговый режим')
+            self.temp_label.setText('Режим RC: WASD - движение, стрелки - высота и поворот')
+
+        # В режиме RC зажатая кнопка повторяет нажатие, иначе сработает таймаут
+        for button in (self.up_button, self.down_button, self.left_button,
+                       self.right_button, self.forward_button, self.back_button):
+            button.setAutoRepeat(self.rc.active)
+            button.setAutoRepeatDelay(100)
+            button.setAutoRepeatInterval(100)
+
+    def toggle_follow(self):
+        if self.follower.active:
+            self.stop_follow()
+            self.temp_label.setText('Следование выключено')
+            return
+        # Следование работает через RC: включаем режим RC, если он выключен
+        if not self.rc.active:
+            self.toggle_rc_mode()
+            if not self.rc.active:
+                return
+        self.follower.start()
+        self.follow_button.setText('Остановить следование')
+        self.temp_label.setText('Следование за лицом: щелчок по видео выбирает лицо')
+
+    def stop_follow(self):
+        if self.follower.active:
+            self.follower.stop()
+            self.follow_button.setText('Следование')
+
+    def update_keyboard_target(self):
+        if not self.pressed_keys:
+            self.rc.clear('keyboard')
+            return
+        velocities = [sum(RC_KEY_VELOCITIES[key][i] for key in self.pressed_keys) for i in range(4)]
+        self.rc.set_target('keyboard', *velocities, hold=True)
+
+    def keyPressEvent(self, event):
+        if self.rc.active and event.key() in RC_KEY_VELOCITIES:
+            if not event.isAutoRepeat():
+                self.pressed_keys.add(event.key())
+                self.update_keyboard_target()
+            return
+        super().keyPressEvent(event)
+
+    def keyReleaseEvent(self, event):
+        if self.rc.active and event.key() in RC_KEY_VELOCITIES:
+            if not event.isAutoRepeat():
+                self.pressed_keys.discard(event.key())
+                self.update_keyboard_target()
+            return
+        super().keyReleaseEvent(event)
+
+    def changeEvent(self, event):
+        # Окно потеряло фокус - отпускания клавиш не придут, сбрасываем их
+        if event.type() == event.ActivationChange and not self.isActiveWindow():
+            self.pressed_keys.clear()
+            self.rc.clear('keyboard')
+        super().changeEvent(event)
+
+    def on_command_finished(self, key, message):
+        self.temp_label.setText(message)
+
+    def on_command_failed(self, key, message):
+        self.temp_label.setText(message)
 
     def closeEvent(self, event):
+        self.timer.stop()
+        self.stats_timer.stop()
+        self.telemetry_timer.stop()
+        self.plot_timer.stop()
+        if self.telemetry_recorder is not None:
+            self.telemetry_recorder.stop()
+        if self.video_recorder is not None:
+            self.video_recorder.stop()
+        self.stop_follow()
+        if self.rc.active:
+            self.rc.stop()
+        self.pipeline.stop()
+        self.pipeline.processor.close()
+        if self.video_source is not None:
+            self.video_source.close()
+        self.dispatcher.stop()
+        self.telemetry.stop()
         self.tello.end()
         event.accept()
 
@@ -446,6 +783,11 @@ class TelloApp(QWidget):
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
-    ex = TelloApp()
+    startup = StartupTimer(STARTED, target=STARTUP_TARGET)
+    startup.mark('imports')
+    ex = TelloApp(startup)
+    startup.mark('window_created')
     ex.show()
+    # Срабатывает после первой отрисовки окна; тогда же начинается загрузка моделей
+    QTimer.singleShot(0, ex.on_window_shown)
     sys.exit(app.exec_())
@@ -0,0 +1,232 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from face_tracking import FaceTracker, HaarFaceDetector
+from hand_tracking import HandTracker
+from video_ingest import open_source
+from vision import Frame, FrameProcessor
+
+# Бенчмарк цикла обработки без дрона и без окна:
+#   python benchmark.py                          # синтетические кадры
+#   python benchmark.py --source flight.mp4      # записанное видео
+#   python benchmark.py --save-baseline          # сохранить результаты как эталон
+#   python benchmark.py --compare                # сравнить с эталоном
+
+RESOLUTIONS = ((480, 360), (960, 720), (1280, 960))
+DRAW_COUNTS = ((1, 0), (4, 0), (0, 1), (0, 2), (4, 2))
+BASELINE_PATH = os.path.join('benchmarks', 'baseline.json')
+# Детектор лиц в FaceTracker запускается раз в столько кадров (без подстройки)
+FACE_INTERVAL = 3
+
+
+def synthetic_frames(width, height, count=30, seed=0):
+    # Детерминированные кадры: градиент, шум и движущиеся фигуры (BGR)
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(40, 200, width, dtype=np.float32)[None, :, None]
+    background = np.broadcast_to(gradient, (height, width, 3)).astype(np.uint8)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        frame += rng.integers(0, 20, frame.shape, dtype=np.uint8)
+        for j in range(3):
+            x = int((0.2 + 0.3 * j) * width + 5 * i) % width
+            y = int(0.5 * height)
+            radius = max(4, height // (8 + 2 * j))
+            cv2.circle(frame, (x, y), radius, (180 - 40 * j, 150, 120 + 40 * j), -1)
+        frames.append(frame)
+    return frames
+
+
+def source_frames(path, width, height, count):
+    source = open_source(path)
+    frames = []
+    try:
+        while len(frames) < count:
+            image = source.read()
+            if image is None:
+                break
+            frames.append(cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA))
+    finally:
+        source.close()
+    if not frames:
+        raise IOError(f'Источник не содержит кадров: {path}')
+    return frames
+
+
+def peak_memory_mb(step, items):
+    # Пик памяти, выделенной за проход по кадрам (Python и NumPy; память OpenCV и
+    # MediaPipe выделяется мимо tracemalloc). Отдельный проход, потому что
+    # трассировка замедляет шаги и исказила бы задержки
+    tracemalloc.start()
+    try:
+        for item in items:
+            step(item)
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+
+def measure(name, step, items, repeat=1, warmup=2):
+    for item in items[:warmup]:
+        step(item)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            start = time.perf_counter()
+            step(item)
+            latencies.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - started
+    peak = peak_memory_mb(step, items)
+    values = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, (50, 95, 99))
+    return {
+        'name': name,
+        'frames': len(values),
+        'fps': round(len(values) / elapsed, 2),
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'peak_mem_mb': round(peak, 2),
+    }
+
+
+def fake_hand(offset):
+    # Набор точек руки для оценки стоимости отрисовки
+    from mediapipe.framework.formats import landmark_pb2
+    hand = landmark_pb2.NormalizedLandmarkList()
+    for i in range(21):
+        point = hand.landmark.add()
+        point.x = 0.3 + offset + 0.01 * (i % 5)
+        point.y = 0.3 + 0.02 * (i // 5)
+    return hand
+
+
+def run_benchmarks(frame_sets, repeat=1, face_backend='haar'):
+    # Каждый случай получает свежие трекеры и MediaPipe, чтобы их состояние не переходило
+    # между случаями, а детектор лиц работает по фиксированному расписанию FACE_INTERVAL:
+    # иначе оно подстраивается под измеренное время и результаты не повторяются
+    results = []
+    haar = HaarFaceDetector()
+
+    for (width, height), images in frame_sets.items():
+        label = f'{width}x{height}'
+        frames = [Frame(i, i / 30.0, image) for i, image in enumerate(images)]
+        grays = [cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) for image in images]
+        rgbs = [cv2.cvtColor(image, cv2.COLOR_BGR2RGB) for image in images]
+
+        processor = FrameProcessor(face_backend, face_interval=FACE_INTERVAL)
+        results.append(measure(f'process@{label}', processor.process, frames, repeat))
+        processor.close()
+        results.append(measure(f'haar_full_frame@{label}', lambda gray: haar.detect(None, gray), grays, repeat))
+        tracker = FaceTracker(haar, interval=FACE_INTERVAL)
+        results.append(measure(f'face_tracker@{label}', tracker.update, rgbs, repeat))
+        processor = FrameProcessor(None)
+        results.append(measure(f'hands@{label}', processor.hands.process, rgbs, repeat))
+        processor.close()
+        processor = FrameProcessor(None, hand_roi=True)
+        results.append(measure(f'hand_tracker@{label}', processor.hand_tracker.update, rgbs, repeat))
+        processor.close()
+
+    # Стоимость отрисовки в зависимости от числа лиц и рук
+    processor = FrameProcessor(None)
+    width, height = next(iter(frame_sets))
+    canvas = np.zeros((height, width, 3), dtype=np.uint8)
+    for faces_count, hands_count in DRAW_COUNTS:
+        faces = [(40 + 90 * i, 60, 80, 80) for i in range(faces_count)]
+        hands = [fake_hand(0.2 * i) for i in range(hands_count)]
+
+        def draw(_):
+            for hand in hands:
+                processor.mp_draw.draw_landmarks(canvas, hand, processor.mp_hands.HAND_CONNECTIONS)
+            for (x, y, w, h) in faces:
+                cv2.rectangle(canvas, (x, y), (x + w, y + h), processor.face_color, 2)
+                cv2.putText(canvas, 'Лицо', (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, processor.face_color, 2)
+
+        results.append(measure(f'drawing@faces={faces_count},hands={hands_count}', draw, list(range(30)), repeat))
+    processor.close()
+    return results
+
+
+def compare(results, baseline, threshold):
+    # Регрессия: p50 вырос больше чем на threshold относительно эталона
+    previous = {item['name']: item for item in baseline['results']}
+    regressions = []
+    for item in results:
+        old = previous.get(item['name'])
+        if old is None or old['p50_ms'] <= 0:
+            continue
+        change = item['p50_ms'] / old['p50_ms'] - 1
+        marker = ''
+        if change > threshold:
+            regressions.append(item['name'])
+            marker = '  <-- регрессия'
+        print(f'{item["name"]:40s} {old["p50_ms"]:9.3f} -> {item["p50_ms"]:9.3f} мс ({change:+.1%}){marker}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Бенчмарк обработки кадров без дрона и без окна')
+    parser.add_argument('--source', help='видеофайл или папка с изображениями вместо синтетических кадров')
+    parser.add_argument('--frames', type=int, default=30, help='кадров на разрешение')
+    parser.add_argument('--repeat', type=int, default=1, help='число проходов по кадрам')
+    parser.add_argument('--resolutions', default=','.join(f'{w}x{h}' for w, h in RESOLUTIONS))
+    parser.add_argument('--face-backend', default='haar', choices=('haar', 'dnn', 'mediapipe'))
+    parser.add_argument('--output', help='сохранить результаты в JSON')
+    parser.add_argument('--save-baseline', action='store_true', help=f'сохранить результаты в {BASELINE_PATH}')
+    parser.add_argument('--compare', action='store_true', help=f'сравнить с {BASELINE_PATH}')
+    parser.add_argument('--threshold', type=float, default=0.15, help='допустимое замедление p50 при --compare')
+    args = parser.parse_args(argv)
+
+    resolutions = [tuple(int(v) for v in item.split('x')) for item in args.resolutions.split(',')]
+    frame_sets = {}
+    for width, height in resolutions:
+        if args.source:
+            frame_sets[(width, height)] = source_frames(args.source, width, height, args.frames)
+        else:
+            frame_sets[(width, height)] = synthetic_frames(width, height, args.frames)
+
+    results = run_benchmarks(frame_sets, args.repeat, args.face_backend)
+    for item in results:
+        print(f'{item["name"]:40s} {item["fps"]:9.1f} к/с  p50 {item["p50_ms"]:8.3f}  '
+              f'p95 {item["p95_ms"]:8.3f}  p99 {item["p99_ms"]:8.3f} мс  пик {item["peak_mem_mb"]:.2f} МБ')
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'machine': platform.machine(),
+        'source': args.source or 'synthetic',
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        if not os.path.exists(BASELINE_PATH):
+            print(f'Эталон не найден: {BASELINE_PATH}')
+            return 2
+        with open(BASELINE_PATH, encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if regressions:
+            print(f'Регрессии: {len(regressions)}')
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
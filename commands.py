@@ -0,0 +1,127 @@
+import heapq
+import itertools
+import threading
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# Приоритеты команд: чем меньше число, тем раньше команда выполняется
+PRIORITY_URGENT = 0
+PRIORITY_NORMAL = 10
+PRIORITY_MOVE = 20
+
+
+class Command:
+    __slots__ = ('key', 'method', 'args', 'priority', 'message', 'error_message', 'seq', 'cancelled')
+
+    def __init__(self, key, method, args, priority, message, error_message, seq):
+        self.key = key
+        self.method = method
+        self.args = args
+        self.priority = priority
+        self.message = message
+        self.error_message = error_message
+        self.seq = seq
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class CommandDispatcher(QObject):
+    # Выполняет блокирующие команды djitellopy в своем потоке.
+    # Срочные команды (посадка) отменяют ожидающие движения,
+    # повторные команды с одинаковым ключом объединяются в одну.
+    command_finished = pyqtSignal(str, str)
+    command_failed = pyqtSignal(str, str)
+
+    def __init__(self, tello, parent=None):
+        super().__init__(parent)
+        self.tello = tello
+        self.heap = []
+        self.pending = {}
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='commands', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def submit(self, key, method, *args, priority=PRIORITY_MOVE, message='', error_message=''):
+        if not self.running:
+            self.command_failed.emit(key, f'{error_message}: нет подключения к Tello')
+            return False
+        cancelled = []
+        with self.condition:
+            if key in self.pending:
+                # Такая команда уже ждет выполнения - новую не добавляем
+                return False
+            if priority == PRIORITY_URGENT:
+                cancelled = self.take_pending(PRIORITY_URGENT)
+            command = Command(key, method, args, priority, message, error_message, next(self.counter))
+            self.pending[key] = command
+            heapq.heappush(self.heap, command)
+            self.condition.notify()
+        self.report_cancelled(cancelled)
+        return True
+
+    def cancel_pending(self, above_priority=PRIORITY_URGENT):
+        with self.condition:
+            cancelled = self.take_pending(above_priority)
+        self.report_cancelled(cancelled)
+
+    def take_pending(self, above_priority):
+        # Снимает ожидающие команды с приоритетом ниже above_priority; вызывается под self.condition
+        cancelled = []
+        for command in self.heap:
+            if command.priority > above_priority and not command.cancelled:
+                command.cancelled = True
+                self.pending.pop(command.key, None)
+                cancelled.append(command)
+        return sorted(cancelled)
+
+    def report_cancelled(self, cancelled):
+        # Об отмененных командах сообщается так же, как об ошибках, но вне блокировки:
+        # обработчик сигнала может сразу отправить новую команду
+        for command in cancelled:
+            self.command_failed.emit(command.key, f'{command.error_message}: команда отменена')
+
+    def pending_count(self):
+        with self.condition:
+            return len(self.pending)
+
+    def next_command(self):
+        with self.condition:
+            while self.running:
+                while self.heap:
+                    command = heapq.heappop(self.heap)
+                    if command.cancelled:
+                        continue
+                    self.pending.pop(command.key, None)
+                    return command
+                self.condition.wait()
+            return None
+
+    def run(self):
+        while True:
+            command = self.next_command()
+            if command is None:
+                return
+            try:
+                getattr(self.tello, command.method)(*command.args)
+            except Exception as e:
+                self.command_failed.emit(command.key, f'{command.error_message}: {str(e)}')
+            else:
+                self.command_finished.emit(command.key, command.message)
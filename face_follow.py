@@ -0,0 +1,142 @@
+import time
+
+from PyQt5.QtCore import QObject, QTimer
+
+
+class PID:
+    # ПИД-регулятор с ограничением выхода и защитой от накопления интеграла.
+    # Интеграл сбрасывается при смене знака ошибки: объект (дрон) сам интегрирует
+    # скорость, и накопленный интеграл иначе уводит его за цель.
+    # rate - производная ошибки, если она известна точнее разности по тактам
+    def __init__(self, kp, ki=0.0, kd=0.0, limit=100.0, integral_limit=1.0):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.limit = limit
+        self.integral_limit = integral_limit
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.previous = None
+
+    def update(self, error, dt, rate=None):
+        if rate is None:
+            rate = (error - self.previous) / dt if self.previous is not None and dt > 0 else 0.0
+        if self.previous is not None and error * self.previous < 0:
+            self.integral = 0.0
+        self.previous = error
+        integral = max(-self.integral_limit, min(self.integral_limit, self.integral + error * dt))
+        output = self.kp * error + self.ki * integral + self.kd * rate
+        if abs(output) < self.limit or output * error < 0:
+            # Интеграл копится, только пока выход не упирается в ограничение
+            self.integral = integral
+        return max(-self.limit, min(self.limit, output))
+
+
+class FaceFollower(QObject):
+    # Следование за лицом: смещение центра выбранного лица по горизонтали -> поворот,
+    # по вертикали -> вверх/вниз, размер рамки -> вперед/назад. Скорости отдаются
+    # в RcController как источник 'follow' по таймеру с постоянной частотой,
+    # независимо от того, как часто приходят обнаружения.
+    #
+    # Обнаружение приходит с задержкой (время захвата кадра в timestamp), поэтому
+    # ошибка экстраполируется на текущий момент по скорости ее изменения между
+    # обнаружениями, но не дальше чем на max_lead секунд; производная регулятора
+    # тоже берется по обнаружениям, а не по тактам.
+    def __init__(self, rc, rate_hz=20, target_size=0.3, max_lead=0.2, lost_timeout=1.0, deadband=0.05,
+                 parent=None):
+        super().__init__(parent)
+        self.rc = rc
+        self.rate_hz = rate_hz
+        self.target_size = target_size  # желаемая высота лица, доля высоты кадра
+        self.max_lead = max_lead
+        self.lost_timeout = lost_timeout
+        self.deadband = deadband
+        # Ошибки нормированы: смещение от -1 до 1 по полуширине/полувысоте кадра, размер - доля кадра
+        self.yaw_pid = PID(kp=60, ki=2, kd=8, limit=60)
+        self.up_down_pid = PID(kp=45, ki=2, kd=5, limit=40)
+        self.forward_pid = PID(kp=150, ki=20, kd=15, limit=35, integral_limit=0.5)
+        self.target = None  # (cx, cy) выбранного лица, доли кадра
+        self.selected = None
+        self.measurement = None  # (timestamp, ошибки)
+        self.rates = (0.0, 0.0, 0.0)
+        self.output = (0, 0, 0)
+        self.last_tick = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+
+    @property
+    def active(self):
+        return self.timer.isActive()
+
+    def start(self):
+        self.reset()
+        self.last_tick = time.monotonic()
+        self.timer.start(int(1000 / self.rate_hz))
+
+    def stop(self):
+        self.timer.stop()
+        self.rc.clear('follow')
+        self.reset()
+
+    def reset(self):
+        for pid in (self.yaw_pid, self.up_down_pid, self.forward_pid):
+            pid.reset()
+        self.target = None
+        self.measurement = None
+        self.rates = (0.0, 0.0, 0.0)
+        self.output = (0, 0, 0)
+
+    def select(self, x, y):
+        # Следовать за лицом, ближайшим к точке (доли кадра)
+        self.selected = (x, y)
+        self.target = None
+
+    def update_detection(self, faces, frame_shape, timestamp):
+        # Вызывается на каждый обработанный кадр; timestamp - время захвата кадра
+        if not len(faces):
+            return
+        h, w = frame_shape[:2]
+        candidates = [((x + fw / 2) / w, (y + fh / 2) / h, fh / h) for x, y, fw, fh in faces]
+        anchor = self.target or self.selected
+        if anchor is None:
+            face = max(candidates, key=lambda c: c[2])
+        else:
+            face = min(candidates, key=lambda c: (c[0] - anchor[0]) ** 2 + (c[1] - anchor[1]) ** 2)
+        cx, cy, size = face
+        self.target = (cx, cy)
+        errors = (2 * cx - 1, 1 - 2 * cy, self.target_size - size)
+
+        if self.measurement is not None:
+            previous_time, previous = self.measurement
+            dt = timestamp - previous_time
+            if dt > 1e-3:
+                self.rates = tuple(0.5 * rate + 0.5 * (e - p) / dt
+                                   for rate, e, p in zip(self.rates, errors, previous))
+        self.measurement = (timestamp, errors)
+
+    def tick(self, now=None):
+        now = time.monotonic() if now is None else now
+        dt = now - self.last_tick if self.last_tick is not None else 1.0 / self.rate_hz
+        self.last_tick = now
+
+        if self.measurement is None or now - self.measurement[0] > self.lost_timeout:
+            # Лицо потеряно - зависаем
+            if self.measurement is not None:
+                self.reset()
+            self.rc.clear('follow')
+            return
+
+        timestamp, errors = self.measurement
+        lead = min(now - timestamp, self.max_lead)
+        predicted = [e + rate * lead for e, rate in zip(errors, self.rates)]
+        predicted = [0.0 if abs(e) < self.deadband else e for e in predicted]
+        x_error, y_error, size_error = predicted
+        x_rate, y_rate, size_rate = self.rates
+
+        yaw = self.yaw_pid.update(x_error, dt, x_rate)
+        up_down = self.up_down_pid.update(y_error, dt, y_rate)
+        forward = self.forward_pid.update(size_error, dt, size_rate)
+        self.output = (int(round(yaw)), int(round(up_down)), int(round(forward)))
+        self.rc.set_target('follow', forward_backward=self.output[2], up_down=self.output[1], yaw=self.output[0])
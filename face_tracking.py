@@ -0,0 +1,181 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+# Модель для детектора OpenCV DNN (res10 SSD): файлы нужно скачать отдельно
+DNN_FACE_PROTO = os.path.join('models', 'deploy.prototxt')
+DNN_FACE_MODEL = os.path.join('models', 'res10_300x300_ssd_iter_140000.caffemodel')
+
+
+class HaarFaceDetector:
+    def __init__(self):
+        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+
+    def detect(self, rgb, gray):
+        return [tuple(box) for box in self.face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5)]
+
+
+class DnnFaceDetector:
+    def __init__(self, proto=DNN_FACE_PROTO, model=DNN_FACE_MODEL, confidence=0.5):
+        if not (os.path.exists(proto) and os.path.exists(model)):
+            raise FileNotFoundError(f'Не найдена модель OpenCV DNN: {proto}, {model}')
+        self.net = cv2.dnn.readNetFromCaffe(proto, model)
+        self.confidence = confidence
+
+    def detect(self, rgb, gray):
+        h, w = rgb.shape[:2]
+        # Модель обучена на BGR со средним (104, 177, 123): каналы кадра переставляются в BGR
+        blob = cv2.dnn.blobFromImage(rgb, 1.0, (300, 300), (104.0, 177.0, 123.0), swapRB=True)
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]
+        faces = []
+        for detection in detections[detections[:, 2] >= self.confidence]:
+            x1, y1, x2, y2 = (detection[3:7] * (w, h, w, h)).astype(int)
+            faces.append((x1, y1, x2 - x1, y2 - y1))
+        return faces
+
+
+class MediaPipeFaceDetector:
+    def __init__(self, confidence=0.5):
+        import mediapipe as mp
+        self.face_detection = mp.solutions.face_detection.FaceDetection(
+            model_selection=0, min_detection_confidence=confidence)
+
+    def detect(self, rgb, gray):
+        h, w = rgb.shape[:2]
+        results = self.face_detection.process(rgb)
+        faces = []
+        for detection in results.detections or ():
+            box = detection.location_data.relative_bounding_box
+            faces.append((int(box.xmin * w), int(box.ymin * h), int(box.width * w), int(box.height * h)))
+        return faces
+
+
+FACE_DETECTORS = {
+    'haar': HaarFaceDetector,
+    'dnn': DnnFaceDetector,
+    'mediapipe': MediaPipeFaceDetector,
+}
+
+
+def create_face_detector(backend):
+    if backend not in FACE_DETECTORS:
+        raise ValueError(f'Неизвестный детектор лиц: {backend}')
+    return FACE_DETECTORS[backend]()
+
+
+class FaceTracker:
+    # Детектор запускается на уменьшенном кадре раз в interval кадров,
+    # между запусками лица сопровождаются оптическим потоком (Лукас-Канаде).
+    # interval и масштаб подстраиваются так, чтобы средняя стоимость кадра
+    # укладывалась в budget секунд. Если interval задан, расписание фиксированное:
+    # детектор раз в interval кадров при неизменном масштабе, независимо от
+    # скорости машины (бенчмарк, воспроизводимый прогон headless.py).
+    def __init__(self, detector, budget=0.012, scale=0.5, min_scale=0.25, max_scale=1.0, max_interval=10,
+                 interval=None):
+        self.detector = detector
+        self.budget = budget
+        self.scale = scale
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.max_interval = max_interval
+        self.adaptive = interval is None
+        self.interval = interval or 1
+        self.frames_since_detect = 0
+        self.detect_time = None
+        self.track_time = 0.0
+        self.faces = []
+        self.points = []
+        self.prev_gray = None
+        self.force_detect = True
+
+        # Буферы уменьшенного кадра; серых два - текущий и предыдущий для оптического потока
+        self.small_rgb = None
+        self.gray_buffers = [None, None]
+
+    def update(self, rgb):
+        h, w = rgb.shape[:2]
+        scale = self.scale
+        small_size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        if self.small_rgb is None or self.small_rgb.shape[:2] != small_size[::-1]:
+            self.small_rgb = np.empty((small_size[1], small_size[0], 3), dtype=np.uint8)
+            self.gray_buffers = [np.empty(small_size[::-1], dtype=np.uint8) for _ in range(2)]
+            self.prev_gray = None
+            self.force_detect = True
+        small_rgb = cv2.resize(rgb, small_size, dst=self.small_rgb, interpolation=cv2.INTER_AREA)
+        small_gray = self.gray_buffers[0] if self.prev_gray is not self.gray_buffers[0] else self.gray_buffers[1]
+        cv2.cvtColor(small_rgb, cv2.COLOR_RGB2GRAY, dst=small_gray)
+
+        start = time.perf_counter()
+        if self.force_detect or self.frames_since_detect >= self.interval - 1:
+            self.detect(small_rgb, small_gray)
+            self.detect_time = self.smooth(self.detect_time, time.perf_counter() - start)
+            self.frames_since_detect = 0
+            self.force_detect = False
+            if self.adaptive:
+                self.adapt()
+        else:
+            # Без лиц сопровождать нечего: пустой кадр ждет очередного запуска детектора,
+            # а если слежение потеряло все лица, детектор запускается на следующем кадре
+            if self.faces:
+                self.track(small_gray)
+                self.track_time = self.smooth(self.track_time, time.perf_counter() - start)
+                self.force_detect = not self.faces
+            self.frames_since_detect += 1
+        self.prev_gray = small_gray
+
+        # Возвращаем рамки в координатах исходного кадра
+        return [tuple(int(round(v / scale)) for v in box) for box in self.faces]
+
+    def smooth(self, average, value, alpha=0.2):
+        return value if average is None else average + alpha * (value - average)
+
+    def detect(self, small_rgb, small_gray):
+        self.faces = [tuple(float(v) for v in box) for box in self.detector.detect(small_rgb, small_gray)]
+        self.points = []
+        for x, y, w, h in self.faces:
+            mask = np.zeros_like(small_gray)
+            mask[int(y):int(y + h), int(x):int(x + w)] = 255
+            points = cv2.goodFeaturesToTrack(small_gray, maxCorners=30, qualityLevel=0.01,
+                                             minDistance=3, mask=mask)
+            self.points.append(points)
+
+    def track(self, small_gray):
+        faces = []
+        points = []
+        for box, old_points in zip(self.faces, self.points):
+            if old_points is None or len(old_points) < 4:
+                continue
+            new_points, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, small_gray, old_points, None,
+                                                             winSize=(15, 15), maxLevel=2)
+            good = status.reshape(-1) == 1
+            if good.sum() < 4:
+                continue
+            shift = np.median(new_points[good] - old_points[good], axis=0).reshape(-1)
+            x, y, w, h = box
+            faces.append((x + shift[0], y + shift[1], w, h))
+            points.append(new_points[good].reshape(-1, 1, 2))
+        self.faces = faces
+        self.points = points
+
+    def adapt(self):
+        # Средняя стоимость кадра: (detect + (N - 1) * track) / N <= budget
+        detect = self.detect_time
+        track = self.track_time
+        if track < self.budget:
+            interval = int(np.ceil(max(detect - track, 0.0) / (self.budget - track))) or 1
+        else:
+            interval = self.max_interval
+        self.interval = min(max(interval, 1), self.max_interval)
+
+        new_scale = self.scale
+        if self.interval == self.max_interval and detect > self.budget * self.max_interval:
+            new_scale = max(self.min_scale, self.scale * 0.85)
+        elif self.interval == 1 and detect < self.budget * 0.5:
+            new_scale = min(self.max_scale, self.scale * 1.1)
+        if new_scale != self.scale:
+            # Точки слежения привязаны к масштабу - после смены нужно новое обнаружение
+            self.scale = new_scale
+            self.force_detect = True
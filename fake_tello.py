@@ -0,0 +1,202 @@
+import queue
+import socket
+import threading
+import time
+
+from djitellopy import Tello
+
+# Скорости имитации: см/с для перемещений и градусы/с для поворотов
+MOVE_SPEED = 100
+ROTATE_SPEED = 90
+TAKEOFF_TIME = 2.0
+
+MOVE_AXES = {
+    'up': ('h', 1), 'down': ('h', -1),
+    'left': ('x', -1), 'right': ('x', 1),
+    'forward': ('y', 1), 'back': ('y', -1),
+}
+
+
+class FakeTello:
+    # Локальная имитация Tello по UDP: принимает команды SDK, отвечает 'ok'
+    # или значением с настраиваемой задержкой и рассылает пакеты состояния.
+    # Порт команд отличается от 8889, потому что его занимает клиент djitellopy,
+    # поэтому клиента нужно создавать через create_client().
+    def __init__(self, host='127.0.0.1', command_port=9889, state_port=Tello.STATE_UDP_PORT,
+                 latency=0.02, state_interval=0.1, time_scale=1.0, battery=100):
+        self.host = host
+        self.command_port = command_port
+        self.state_port = state_port
+        self.latency = latency
+        self.state_interval = state_interval
+        self.time_scale = time_scale
+        self.state = {'pitch': 0, 'roll': 0, 'yaw': 0, 'vgx': 0, 'vgy': 0, 'vgz': 0,
+                      'templ': 60, 'temph': 62, 'tof': 10, 'h': 0, 'bat': battery,
+                      'baro': 0.0, 'time': 0, 'agx': 0.0, 'agy': 0.0, 'agz': -1000.0}
+        self.position = {'x': 0.0, 'y': 0.0}
+        self.flying = False
+        self.takeoff_at = 0.0
+        self.started_at = time.monotonic()
+        self.rc = (0, 0, 0, 0)
+        self.log = []
+        self.client = None
+        self.lock = threading.Lock()
+        self.commands = queue.Queue()
+        self.running = False
+        self.threads = []
+        self.socket = None
+
+    def start(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((self.host, self.command_port))
+        self.socket.settimeout(0.1)
+        self.running = True
+        self.started_at = time.monotonic()
+        self.threads = [
+            threading.Thread(target=self.receive_loop, name='fake-tello-receive', daemon=True),
+            threading.Thread(target=self.command_loop, name='fake-tello-commands', daemon=True),
+            threading.Thread(target=self.state_loop, name='fake-tello-state', daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.running = False
+        self.commands.put(None)
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+        self.threads = []
+        self.socket.close()
+
+    def create_client(self):
+        # Клиент djitellopy, отправляющий команды на этот эмулятор
+        tello = Tello(host=self.host)
+        tello.address = (self.host, self.command_port)
+        return tello
+
+    def receive_loop(self):
+        while self.running:
+            try:
+                data, address = self.socket.recvfrom(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            command = data.decode('utf-8', errors='replace').strip()
+            self.client = address
+            with self.lock:
+                self.log.append((time.monotonic() - self.started_at, command))
+            # rc-команды не подтверждаются и выполняются сразу
+            if command.startswith('rc '):
+                self.handle_rc(command)
+            else:
+                self.commands.put((command, address))
+
+    def command_loop(self):
+        # Дрон выполняет команды по одной, ответ приходит после выполнения
+        while self.running:
+            item = self.commands.get()
+            if item is None:
+                break
+            command, address = item
+            response, duration = self.execute(command)
+            time.sleep(self.latency + duration * self.time_scale)
+            try:
+                self.socket.sendto(response.encode('utf-8'), address)
+            except OSError:
+                break
+
+    def state_loop(self):
+        state_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Пакеты состояния идут с адреса эмулятора: djitellopy различает дроны по IP отправителя
+        state_socket.bind((self.host, 0))
+        last = time.monotonic()
+        while self.running:
+            time.sleep(self.state_interval)
+            now = time.monotonic()
+            self.integrate(now - last)
+            last = now
+            if self.client is None:
+                continue
+            with self.lock:
+                line = ';'.join(f'{key}:{value}' for key, value in self.state.items()) + ';\r\n'
+            try:
+                state_socket.sendto(line.encode('ascii'), (self.client[0], self.state_port))
+            except OSError:
+                break
+        state_socket.close()
+
+    def integrate(self, dt):
+        with self.lock:
+            if self.flying:
+                self.state['time'] = int(time.monotonic() - self.takeoff_at)
+                left_right, forward_backward, up_down, yaw = self.rc
+                self.position['x'] += left_right * dt
+                self.position['y'] += forward_backward * dt
+                self.state['h'] = max(0, int(self.state['h'] + up_down * dt))
+                self.state['yaw'] = int((self.state['yaw'] + yaw * dt + 180) % 360 - 180)
+            self.state['vgx'], self.state['vgy'], self.state['vgz'] = self.rc[1] // 10, self.rc[0] // 10, self.rc[2] // 10
+            self.state['tof'] = self.state['h'] + 10
+            self.state['baro'] = round(self.state['h'] / 100, 2)
+
+    def handle_rc(self, command):
+        try:
+            values = tuple(int(value) for value in command.split()[1:5])
+        except ValueError:
+            return
+        if len(values) == 4:
+            with self.lock:
+                self.rc = values
+
+    def execute(self, command):
+        # Возвращает (ответ, время выполнения в секундах)
+        parts = command.split()
+        if not parts:
+            return 'error', 0.0
+        name, args = parts[0], parts[1:]
+
+        read_commands = {
+            'battery?': lambda: self.state['bat'],
+            'height?': lambda: f"{self.state['h'] // 10}dm",
+            'time?': lambda: f"{self.state['time']}s",
+            'temp?': lambda: f"{self.state['templ']}~{self.state['temph']}C",
+            'speed?': lambda: MOVE_SPEED,
+            'sdk?': lambda: 20,
+            'sn?': lambda: 'FAKETELLO0001',
+        }
+        if name in read_commands:
+            with self.lock:
+                return str(read_commands[name]()), 0.0
+
+        with self.lock:
+            if name in ('command', 'streamon', 'streamoff', 'speed', 'port', 'setfps',
+                        'setbitrate', 'setresolution', 'downvision'):
+                return 'ok', 0.0
+            if name == 'takeoff':
+                if self.flying:
+                    return 'error', 0.0
+                self.flying = True
+                self.takeoff_at = time.monotonic()
+                self.state['h'] = 80
+                return 'ok', TAKEOFF_TIME
+            if name in ('land', 'emergency'):
+                self.flying = False
+                self.rc = (0, 0, 0, 0)
+                self.state['h'] = 0
+                return 'ok', TAKEOFF_TIME if name == 'land' else 0.0
+            if not self.flying:
+                return 'error Not flying', 0.0
+            if name in MOVE_AXES and args:
+                distance = int(args[0])
+                key, sign = MOVE_AXES[name]
+                if key == 'h':
+                    self.state['h'] = max(0, self.state['h'] + sign * distance)
+                else:
+                    self.position[key] += sign * distance
+                self.state['bat'] = max(0, self.state['bat'] - 1)
+                return 'ok', distance / MOVE_SPEED
+            if name in ('cw', 'ccw') and args:
+                angle = int(args[0]) * (1 if name == 'cw' else -1)
+                self.state['yaw'] = (self.state['yaw'] + angle + 180) % 360 - 180
+                return 'ok', abs(angle) / ROTATE_SPEED
+        return 'error', 0.0
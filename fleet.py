@@ -0,0 +1,320 @@
+import argparse
+import concurrent.futures
+import math
+import os
+import sys
+import threading
+import time
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (QApplication, QComboBox, QGridLayout, QHBoxLayout, QLabel, QPushButton,
+                             QVBoxLayout, QWidget)
+from djitellopy import Tello
+
+from commands import CommandDispatcher, PRIORITY_MOVE, PRIORITY_NORMAL, PRIORITY_URGENT
+from gestures import GESTURE_COMMANDS
+from pipeline import LatestQueue, StageStats
+from startup import BackgroundLoader
+from telemetry import TelemetryMonitor
+from video_ingest import UdpH264Source
+from video_widget import VideoLabel
+from vision import Frame, FrameProcessor
+
+# Управление несколькими Tello EDU в режиме станции (каждый дрон со своим IP
+# в общей сети). Видео каждого дрона переводится на свой UDP-порт командой 'port':
+#   python fleet.py --hosts 192.168.1.11,192.168.1.12,192.168.1.13
+
+VIDEO_BASE_PORT = 11111
+MOVE_DISTANCE = 30
+
+
+class FleetDrone:
+    # Один дрон флота: свое подключение, диспетчер команд, телеметрия,
+    # прием видео и поток захвата кадров
+    def __init__(self, index, host, video_port):
+        self.index = index
+        self.host = host
+        self.video_port = video_port
+        self.tello = Tello(host=host, vs_udp=video_port)
+        self.dispatcher = CommandDispatcher(self.tello)
+        self.telemetry = TelemetryMonitor(self.tello.get_current_state)
+        self.video_source = None
+        self.frame_queue = LatestQueue(1)
+        self.result_queue = LatestQueue(1)
+        self.capture_stats = StageStats()
+        self.connected = False
+        self.running = False
+        self.thread = None
+        self.status = 'Не подключен'
+
+    def connect(self):
+        self.tello.connect()
+        # Каждый дрон шлет видео на свой порт, пакеты состояния - на общий 8890
+        self.tello.set_network_ports(Tello.STATE_UDP_PORT, self.video_port)
+        self.tello.streamon()
+        self.video_source = UdpH264Source(self.video_port).start()
+        self.dispatcher.start()
+        self.telemetry.start()
+        self.running = True
+        self.thread = threading.Thread(target=self.capture_loop, name=f'capture-{self.index}', daemon=True)
+        self.thread.start()
+        self.connected = True
+
+    def capture_loop(self):
+        last_image = None
+        frame_id = 0
+        while self.running:
+            item = self.video_source.read_timed()
+            if item is None or item[0] is last_image:
+                time.sleep(0.002)
+                continue
+            last_image, captured_at = item
+            frame_id += 1
+            self.frame_queue.put(Frame(frame_id, captured_at, last_image))
+            self.capture_stats.tick()
+
+    def close(self):
+        self.running = False
+        self.frame_queue.close()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        if self.video_source is not None:
+            self.video_source.close()
+        self.dispatcher.stop()
+        self.telemetry.stop()
+        if self.connected:
+            self.tello.end()
+
+
+class BatchInference:
+    # Обработка кадров всех дронов пачками: за один проход берется последний
+    # кадр каждого дрона, и кадры обрабатываются параллельно в пуле потоков
+    # (OpenCV и MediaPipe отпускают GIL). У каждого дрона свой FrameProcessor,
+    # потому что MediaPipe Hands и фильтр жестов хранят состояние.
+    def __init__(self, drones, processor_factory=FrameProcessor, workers=None):
+        self.drones = drones
+        self.processors = [processor_factory() for _ in drones]
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers or min(len(drones), os.cpu_count() or 1))
+        self.stats = StageStats()
+        self.batch_sizes = []
+        self.running = False
+        self.thread = None
+        self.error = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='batch-inference', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+        self.executor.shutdown(wait=False)
+        for processor in self.processors:
+            processor.close()
+
+    def run(self):
+        while self.running:
+            batch = [(drone, frame) for drone, frame in
+                     ((drone, drone.frame_queue.get_nowait()) for drone in self.drones) if frame is not None]
+            if not batch:
+                time.sleep(0.002)
+                continue
+            futures = [self.executor.submit(self.processors[drone.index].process, frame)
+                       for drone, frame in batch]
+            for (drone, _), future in zip(batch, futures):
+                try:
+                    drone.result_queue.put(future.result())
+                except Exception as e:
+                    self.error = e
+            self.stats.tick()
+            self.batch_sizes = self.batch_sizes[-99:] + [len(batch)]
+
+
+class Fleet:
+    def __init__(self, hosts, video_base_port=VIDEO_BASE_PORT):
+        self.drones = [FleetDrone(i, host, video_base_port + i) for i, host in enumerate(hosts)]
+        self.groups = {'Все': list(range(len(self.drones)))}
+        for drone in self.drones:
+            self.groups[f'Дрон {drone.index + 1} ({drone.host})'] = [drone.index]
+        self.inference = BatchInference(self.drones)
+
+    def add_group(self, name, indices):
+        self.groups[name] = list(indices)
+
+    def connect_all(self):
+        # Подключение дронов параллельно; возвращает {индекс: ошибка}.
+        # Уже подключенные пропускаются, так что повтор подключает только неудачные
+        errors = {}
+        drones = [drone for drone in self.drones if not drone.connected]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(drones))) as executor:
+            futures = {executor.submit(drone.connect): drone for drone in drones}
+            for future, drone in futures.items():
+                try:
+                    future.result()
+                    drone.status = 'Подключен'
+                except Exception as e:
+                    drone.status = f'Ошибка подключения: {str(e)}'
+                    errors[drone.index] = e
+        self.inference.start()
+        return errors
+
+    def command(self, group, key, method, *args, priority=PRIORITY_NORMAL, message='', error_message=''):
+        # У каждого дрона свой поток диспетчера, поэтому команда уходит всем дронам группы одновременно
+        for index in self.groups[group]:
+            drone = self.drones[index]
+            if drone.connected:
+                drone.dispatcher.submit(key, method, *args, priority=priority,
+                                        message=message, error_message=error_message)
+
+    def close(self):
+        self.inference.stop()
+        for drone in self.drones:
+            drone.close()
+
+
+class FleetWindow(QWidget):
+    def __init__(self, fleet):
+        super().__init__()
+        self.fleet = fleet
+        self.setWindowTitle('Управление флотом Tello')
+        self.cells = []
+        self.initUI()
+
+        for drone, (video_label, info_label, status_label) in zip(fleet.drones, self.cells):
+            drone.dispatcher.command_finished.connect(lambda key, message, label=status_label: label.setText(message))
+            drone.dispatcher.command_failed.connect(lambda key, message, label=status_label: label.setText(message))
+
+        self.connector = BackgroundLoader(self.fleet.connect_all, self)
+        self.connector.loaded.connect(self.on_connected)
+        self.connector.failed.connect(self.on_connect_failed)
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.update_frames)
+        self.info_timer = QTimer()
+        self.info_timer.timeout.connect(self.update_info)
+
+    def initUI(self):
+        layout = QVBoxLayout()
+        grid = QGridLayout()
+        columns = math.ceil(math.sqrt(len(self.fleet.drones)))
+        for drone in self.fleet.drones:
+            cell = QVBoxLayout()
+            video_label = VideoLabel(f'Дрон {drone.index + 1}: {drone.host}')
+            info_label = QLabel('')
+            status_label = QLabel(drone.status)
+            cell.addWidget(video_label)
+            cell.addWidget(info_label)
+            cell.addWidget(status_label)
+            grid.addLayout(cell, drone.index // columns, drone.index % columns)
+            self.cells.append((video_label, info_label, status_label))
+        layout.addLayout(grid)
+
+        self.fleet_label = QLabel('Обработка: ')
+        layout.addWidget(self.fleet_label)
+
+        controls = QHBoxLayout()
+        self.group_box = QComboBox()
+        self.group_box.addItems(self.fleet.groups)
+        controls.addWidget(self.group_box)
+
+        self.connect_button = QPushButton('Подключиться')
+        self.connect_button.clicked.connect(self.connect_all)
+        controls.addWidget(self.connect_button)
+
+        buttons = (
+            ('Взлет', lambda: self.group_command('takeoff', 'takeoff', 'Дрон взлетел', 'Ошибка при взлете')),
+            ('Посадка', self.land),
+            ('Вверх', lambda: self.group_move('move_up', 'Движение вверх', 'Ошибка при движении вверх')),
+            ('Вниз', lambda: self.group_move('move_down', 'Движение вниз', 'Ошибка при движении вниз')),
+            ('Вперед', lambda: self.group_move('move_forward', 'Движение вперед', 'Ошибка при движении вперед')),
+            ('Назад', lambda: self.group_move('move_back', 'Движение назад', 'Ошибка при движении назад')),
+            ('Влево', lambda: self.group_move('move_left', 'Движение влево', 'Ошибка при движении влево')),
+            ('Вправо', lambda: self.group_move('move_right', 'Движение вправо', 'Ошибка при движении вправо')),
+        )
+        for title, slot in buttons:
+            button = QPushButton(title)
+            button.clicked.connect(slot)
+            controls.addWidget(button)
+        layout.addLayout(controls)
+        self.setLayout(layout)
+
+    def connect_all(self):
+        # Подключение с повторами занимает секунды, поэтому идет в фоне, а не в потоке GUI
+        self.connect_button.setEnabled(False)
+        for _, _, status_label in self.cells:
+            status_label.setText('Подключение...')
+        self.connector.start()
+
+    def on_connected(self, errors):
+        self.connect_button.setEnabled(True)
+        for drone, (_, _, status_label) in zip(self.fleet.drones, self.cells):
+            status_label.setText(drone.status)
+        self.timer.start(10)
+        self.info_timer.start(200)
+
+    def on_connect_failed(self, message):
+        self.connect_button.setEnabled(True)
+        self.fleet_label.setText(f'Ошибка подключения: {message}')
+
+    def group_command(self, key, method, message, error_message, *args, priority=PRIORITY_NORMAL):
+        self.fleet.command(self.group_box.currentText(), key, method, *args, priority=priority,
+                           message=message, error_message=error_message)
+
+    def group_move(self, method, message, error_message):
+        self.group_command(method, method, message, error_message, MOVE_DISTANCE, priority=PRIORITY_MOVE)
+
+    def land(self):
+        self.group_command('land', 'land', 'Дрон приземляется', 'Ошибка при посадке', priority=PRIORITY_URGENT)
+
+    def update_frames(self):
+        for drone, (video_label, _, _) in zip(self.fleet.drones, self.cells):
+            result = drone.result_queue.get_nowait()
+            if result is None:
+                continue
+            video_label.set_frame(result.image)
+            # Жест управляет только тем дроном, в кадре которого он распознан
+            if result.gesture_event == 'palm':
+                drone.dispatcher.submit('land', 'land', priority=PRIORITY_URGENT,
+                                        message='Ладонь обнаружена: Дрон садится', error_message='Ошибка при посадке')
+            elif result.gesture_event in GESTURE_COMMANDS:
+                command, value, message, error_message = GESTURE_COMMANDS[result.gesture_event]
+                drone.dispatcher.submit(command, command, value, message=message, error_message=error_message)
+
+    def update_info(self):
+        for drone, (_, info_label, _) in zip(self.fleet.drones, self.cells):
+            snapshot = drone.telemetry.latest
+            if snapshot.seq:
+                info_label.setText(f'Батарея: {snapshot.get("bat"):.0f}% | Высота: {snapshot.get("h"):.0f} см | '
+                                   f'Видео: {drone.capture_stats.fps:.0f} к/с')
+        sizes = self.fleet.inference.batch_sizes
+        average = sum(sizes) / len(sizes) if sizes else 0
+        self.fleet_label.setText(f'Обработка: {self.fleet.inference.stats.fps:.1f} пачек/с, '
+                                 f'в среднем {average:.1f} кадров в пачке')
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        self.info_timer.stop()
+        self.fleet.close()
+        event.accept()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Управление несколькими Tello EDU')
+    parser.add_argument('--hosts', required=True, help='IP-адреса дронов через запятую')
+    parser.add_argument('--video-base-port', type=int, default=VIDEO_BASE_PORT)
+    args = parser.parse_args(argv)
+
+    app = QApplication(sys.argv[:1])
+    fleet = Fleet([host.strip() for host in args.hosts.split(',') if host.strip()], args.video_base_port)
+    window = FleetWindow(fleet)
+    window.show()
+    return app.exec_()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
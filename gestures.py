@@ -0,0 +1,143 @@
+import collections
+import time
+
+import numpy as np
+
+# Индексы точек MediaPipe Hands
+WRIST = 0
+THUMB_MCP, THUMB_IP, THUMB_TIP = 2, 3, 4
+MIDDLE_MCP = 9
+FINGER_MCPS = np.array([5, 9, 13, 17])
+FINGER_PIPS = np.array([6, 10, 14, 18])
+FINGER_TIPS = np.array([8, 12, 16, 20])
+
+# Пауза (в секундах) перед повторной командой того же жеста
+DEFAULT_COOLDOWNS = {
+    'palm': 1.0,
+    'fist': 3.0,
+}
+DEFAULT_COOLDOWN = 1.5
+
+# Жест -> (метод Tello, аргумент, сообщение, текст ошибки)
+GESTURE_COMMANDS = {
+    'fist': ('rotate_clockwise', 90, 'Кулак обнаружен: Дрон поворачивается на 90 градусов', 'Ошибка при повороте'),
+    'index_up': ('move_up', 20, 'Указательный палец вверх обнаружен: Дрон летит вверх на 20 см', 'Ошибка при движении вверх'),
+    'index_down': ('move_down', 20, 'Указательный палец вниз обнаружен: Дрон летит вниз на 20 см', 'Ошибка при движении вниз'),
+    'forward': ('move_forward', 30, 'Движение вперед обнаружено: Дрон движется вперед на 30 см', 'Ошибка при движении вперед'),
+    'back': ('move_back', 30, 'Движение назад обнаружено: Дрон движется назад на 30 см', 'Ошибка при движении назад'),
+    'left': ('move_left', 30, 'Движение влево обнаружено: Дрон движется влево на 30 см', 'Ошибка при движении влево'),
+    'right': ('move_right', 30, 'Движение вправо обнаружено: Дрон движется вправо на 30 см', 'Ошибка при движении вправо'),
+}
+
+
+def landmarks_to_array(hand_landmarks):
+    # Все 21 точка руки в массив (21, 3)
+    return np.array([(p.x, p.y, p.z) for p in hand_landmarks.landmark], dtype=np.float32)
+
+
+def finger_states(points):
+    # Разогнутые пальцы: большой, указательный, средний, безымянный, мизинец
+    wrist = points[WRIST]
+    tips = np.linalg.norm(points[FINGER_TIPS, :2] - wrist[:2], axis=1)
+    pips = np.linalg.norm(points[FINGER_PIPS, :2] - wrist[:2], axis=1)
+    fingers = tips > pips * 1.15
+
+    # Большой палец разогнут, если кончик дальше от основания среднего пальца, чем сустав
+    middle_mcp = points[MIDDLE_MCP, :2]
+    thumb = (np.linalg.norm(points[THUMB_TIP, :2] - middle_mcp) >
+             np.linalg.norm(points[THUMB_IP, :2] - middle_mcp) * 1.1)
+    return np.concatenate(([thumb], fingers))
+
+
+def pointing_direction(points, fingers, aspect=1.0):
+    # Направление вытянутых пальцев: 'up', 'down', 'left' или 'right'
+    vectors = points[FINGER_TIPS[fingers], :2] - points[FINGER_MCPS[fingers], :2]
+    dx, dy = vectors.mean(axis=0)
+    dx *= aspect
+    if abs(dy) >= abs(dx):
+        return 'up' if dy < 0 else 'down'
+    return 'left' if dx < 0 else 'right'
+
+
+def classify_gesture(points, aspect=1.0):
+    extended = finger_states(points)
+    fingers = extended[1:]
+    count = int(fingers.sum())
+
+    # Проверка на ладонь (открытая рука)
+    if count == 4 and extended[0]:
+        return 'palm'
+
+    # Проверка на кулак (сжатая рука)
+    if count == 0:
+        return 'fist'
+
+    index, middle, ring, pinky = fingers
+    direction = pointing_direction(points, fingers, aspect)
+
+    # Указательный палец вверх / вниз
+    if index and not (middle or ring or pinky):
+        if direction == 'up':
+            return 'index_up'
+        if direction == 'down':
+            return 'index_down'
+        return None
+
+    # Два пальца: вверх - вперед, в сторону - влево/вправо
+    if index and middle and not (ring or pinky):
+        if direction == 'up':
+            return 'forward'
+        if direction in ('left', 'right'):
+            return direction
+        return None
+
+    # Безымянный и мизинец - назад
+    if ring and pinky and not (index or middle):
+        return 'back'
+
+    return None
+
+
+class GestureFilter:
+    # Сглаживание жестов по скользящему окну с гистерезисом:
+    # новый жест подтверждается, когда занимает не меньше enter_ratio окна,
+    # текущий сбрасывается, когда его доля падает ниже exit_ratio.
+    # Событие выдается только при переходе в новый жест и с учетом паузы.
+    def __init__(self, window=8, enter_ratio=0.7, exit_ratio=0.3,
+                 cooldowns=None, default_cooldown=DEFAULT_COOLDOWN):
+        self.history = collections.deque(maxlen=window)
+        self.enter_ratio = enter_ratio
+        self.exit_ratio = exit_ratio
+        self.cooldowns = dict(DEFAULT_COOLDOWNS if cooldowns is None else cooldowns)
+        self.default_cooldown = default_cooldown
+        self.state = None
+        self.last_fired = {}
+
+    def reset(self):
+        self.history.clear()
+        self.state = None
+
+    def update(self, gesture, now=None):
+        if now is None:
+            now = time.monotonic()
+        self.history.append(gesture)
+        size = self.history.maxlen
+        counts = collections.Counter(self.history)
+
+        if self.state is not None and counts[self.state] / size < self.exit_ratio:
+            self.state = None
+
+        candidate, count = counts.most_common(1)[0]
+        if candidate == self.state or count / size < self.enter_ratio:
+            return None
+
+        self.state = candidate
+        if candidate is None:
+            return None
+
+        cooldown = self.cooldowns.get(candidate, self.default_cooldown)
+        last = self.last_fired.get(candidate)
+        if last is not None and now - last < cooldown:
+            return None
+        self.last_fired[candidate] = now
+        return candidate
@@ -0,0 +1,126 @@
+import numpy as np
+
+
+class HandTracker:
+    # MediaPipe Hands на вырезанной области кадра вместо всего кадра.
+    # Область предсказывается по точкам рук с прошлого кадра (с учетом их
+    # движения и с запасом margin), а если рук нет - строится вокруг лиц.
+    # Область не меняется, пока рука внутри нее: так MediaPipe продолжает
+    # слежение в тех же координатах. Раз в reacquire_interval кадров и сразу
+    # после потери руки кадр обрабатывается целиком. Точки возвращаются в
+    # координатах всего кадра, поэтому жесты и отрисовка не меняются.
+    def __init__(self, hands, margin=0.6, face_expand=(2.0, 0.5, 3.0), reacquire_interval=15,
+                 min_size=96, max_fraction=0.6):
+        self.hands = hands
+        self.margin = margin
+        self.face_expand = face_expand  # по бокам, сверху и снизу лица, в размерах лица
+        self.reacquire_interval = reacquire_interval
+        self.min_size = min_size
+        self.max_fraction = max_fraction
+        self.region = None
+        self.box = None
+        self.motion = (0.0, 0.0)
+        self.frames_since_full = 0
+        self.force_full = True
+        self.pixels = 1.0  # доля пикселей кадра, обработанных на последнем шаге
+
+    def update(self, rgb, faces=()):
+        h, w = rgb.shape[:2]
+        region = self.plan(w, h, faces)
+        if region is None:
+            image = rgb
+            self.frames_since_full = 0
+        else:
+            x, y, rw, rh = region
+            image = np.ascontiguousarray(rgb[y:y + rh, x:x + rw])
+            self.frames_since_full += 1
+
+        # Буфер только для чтения - MediaPipe не копирует его
+        writeable = image.flags.writeable
+        image.flags.writeable = False
+        try:
+            results = self.hands.process(image)
+        finally:
+            image.flags.writeable = writeable
+        hands = list(results.multi_hand_landmarks or ())
+
+        if region is not None:
+            hands = [self.to_frame(hand, region, w, h) for hand in hands]
+            # Рука, которую вели по области, потеряна - следующий кадр целиком
+            self.force_full = not hands and self.box is not None
+        self.region = region
+        self.pixels = 1.0 if region is None else region[2] * region[3] / (w * h)
+
+        box = self.bounds(hands, w, h) if hands else None
+        if box is not None and self.box is not None:
+            self.motion = (box[0] + box[2] / 2 - self.box[0] - self.box[2] / 2,
+                           box[1] + box[3] / 2 - self.box[1] - self.box[3] / 2)
+        else:
+            self.motion = (0.0, 0.0)
+        self.box = box
+        return hands
+
+    def plan(self, w, h, faces):
+        # Область (x, y, w, h) для следующего кадра или None - весь кадр
+        if self.force_full or self.frames_since_full >= self.reacquire_interval:
+            self.force_full = False
+            return None
+        if self.box is not None:
+            bx, by, bw, bh = self.box
+            bx += self.motion[0]
+            by += self.motion[1]
+            if self.region is not None and self.inside((bx, by, bw, bh), self.region):
+                return self.region
+            pad = self.margin * max(bw, bh)
+            box = (bx - pad, by - pad, bw + 2 * pad, bh + 2 * pad)
+        elif len(faces):
+            side, above, below = self.face_expand
+            boxes = [(fx - side * fw, fy - above * fh, fw * (1 + 2 * side), fh * (1 + above + below))
+                     for fx, fy, fw, fh in faces]
+            x1 = min(b[0] for b in boxes)
+            y1 = min(b[1] for b in boxes)
+            x2 = max(b[0] + b[2] for b in boxes)
+            y2 = max(b[1] + b[3] for b in boxes)
+            box = (x1, y1, x2 - x1, y2 - y1)
+        else:
+            return None
+        return self.clamp(box, w, h)
+
+    def clamp(self, box, w, h):
+        x, y, bw, bh = box
+        bw = max(bw, self.min_size)
+        bh = max(bh, self.min_size)
+        cx, cy = x + box[2] / 2, y + box[3] / 2
+        x1 = int(max(0, cx - bw / 2))
+        y1 = int(max(0, cy - bh / 2))
+        x2 = int(min(w, cx + bw / 2))
+        y2 = int(min(h, cy + bh / 2))
+        # Большая область почти не экономит и мешает слежению - берем весь кадр
+        if x2 - x1 < 2 or y2 - y1 < 2 or (x2 - x1) * (y2 - y1) > self.max_fraction * w * h:
+            return None
+        return x1, y1, x2 - x1, y2 - y1
+
+    def inside(self, box, region, border=0.1):
+        # Рамка целиком внутри области, не ближе border размера области к краю
+        x, y, w, h = box
+        rx, ry, rw, rh = region
+        return (x >= rx + border * rw and y >= ry + border * rh
+                and x + w <= rx + (1 - border) * rw and y + h <= ry + (1 - border) * rh)
+
+    def bounds(self, hands, w, h):
+        points = np.array([(p.x, p.y) for hand in hands for p in hand.landmark], dtype=np.float32)
+        x1, y1 = points.min(axis=0) * (w, h)
+        x2, y2 = points.max(axis=0) * (w, h)
+        return float(x1), float(y1), float(x2 - x1), float(y2 - y1)
+
+    def to_frame(self, hand, region, w, h):
+        # Нормированные координаты области -> нормированные координаты кадра
+        from mediapipe.framework.formats import landmark_pb2
+        x, y, rw, rh = region
+        result = landmark_pb2.NormalizedLandmarkList()
+        for p in hand.landmark:
+            point = result.landmark.add()
+            point.x = (p.x * rw + x) / w
+            point.y = (p.y * rh + y) / h
+            point.z = p.z * rw / w
+        return result
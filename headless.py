@@ -0,0 +1,245 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+from PyQt5.QtCore import Qt
+
+from commands import CommandDispatcher, PRIORITY_URGENT
+from gestures import GESTURE_COMMANDS
+from pipeline import VisionPipeline
+from profiling import StageProfiler
+from video_ingest import open_source
+from vision import Frame, FrameProcessor
+
+# Запуск обработки видео без дрона и без окна:
+#   python headless.py --source flight.mp4 --output results.jsonl
+#   python headless.py --source frames/ --realtime --fake-tello --latency 0.1
+
+# Детектор лиц запускается раз в столько кадров в детерминированном прогоне
+OFFLINE_FACE_INTERVAL = 3
+
+
+class PacedReader:
+    # Отдает кадры источника с его частотой, как живой поток
+    def __init__(self, source, speed=1.0):
+        self.source = source
+        self.interval = 1.0 / (source.fps * speed)
+        self.next_time = None
+        self.image = None
+        self.finished = False
+
+    def __call__(self):
+        now = time.monotonic()
+        if self.finished or (self.next_time is not None and now < self.next_time):
+            return self.image
+        image = self.source.read()
+        if image is None:
+            self.finished = True
+            return self.image
+        self.next_time = (self.next_time or now) + self.interval
+        self.image = image
+        return image
+
+
+class GestureCommander:
+    # Отправляет подтвержденные жесты на дрон (обычно эмулятор) через диспетчер команд
+    def __init__(self, tello):
+        self.dispatcher = CommandDispatcher(tello)
+        # Цикла событий Qt здесь нет, поэтому итоги команд считаются прямо в потоке диспетчера
+        self.dispatcher.command_finished.connect(self.on_finished, Qt.DirectConnection)
+        self.dispatcher.command_failed.connect(self.on_failed, Qt.DirectConnection)
+        self.sent = 0
+        self.finished = 0
+        self.failed = 0
+
+    def start(self):
+        self.dispatcher.start()
+
+    def stop(self):
+        self.dispatcher.stop()
+
+    def on_finished(self, key, message):
+        self.finished += 1
+
+    def on_failed(self, key, message):
+        self.failed += 1
+
+    def handle(self, gesture_event):
+        if gesture_event == 'palm':
+            self.sent += self.dispatcher.submit('land', 'land', priority=PRIORITY_URGENT,
+                                                message='land', error_message='Ошибка при посадке')
+        elif gesture_event in GESTURE_COMMANDS:
+            command, value, message, error_message = GESTURE_COMMANDS[gesture_event]
+            self.sent += self.dispatcher.submit(command, command, value,
+                                                message=message, error_message=error_message)
+
+
+def result_record(result):
+    return {
+        'frame': result.frame_id,
+        'timestamp': round(result.timestamp, 6),
+        'faces': [[int(v) for v in box] for box in result.faces],
+        'gesture': result.gesture,
+        'event': result.gesture_event,
+    }
+
+
+def run_offline(source, processor, max_frames=None, on_result=None):
+    # Детерминированный прогон: каждый кадр обрабатывается по порядку,
+    # время кадра берется из частоты источника, а не из часов
+    latencies = []
+    frame_id = 0
+    started = time.perf_counter()
+    while max_frames is None or frame_id < max_frames:
+        image = source.read()
+        if image is None:
+            break
+        frame_id += 1
+        start = time.perf_counter()
+        result = processor.process(Frame(frame_id, frame_id / source.fps, image))
+        latencies.append(time.perf_counter() - start)
+        if on_result is not None:
+            on_result(result)
+    return summarize(frame_id, time.perf_counter() - started, latencies)
+
+
+def run_realtime(source, processor, max_frames=None, on_result=None, speed=1.0):
+    # Прогон через VisionPipeline с темпом источника: кадры теряются так же, как вживую
+    processor.wait_ready()
+    reader = PacedReader(source, speed)
+    pipeline = VisionPipeline(reader, processor)
+    latencies = []
+    processed = 0
+    started = time.perf_counter()
+    pipeline.start()
+    try:
+        while max_frames is None or processed < max_frames:
+            result = pipeline.poll_result()
+            if result is None:
+                if (reader.finished and not len(pipeline.frame_queue) and not len(pipeline.result_queue)
+                        and not getattr(processor, 'in_flight', 0)):
+                    time.sleep(0.05)
+                    if not len(pipeline.result_queue):
+                        break
+                time.sleep(0.001)
+                continue
+            processed += 1
+            latencies.append(time.monotonic() - result.timestamp)
+            if on_result is not None:
+                on_result(result)
+    finally:
+        pipeline.stop()
+    summary = summarize(processed, time.perf_counter() - started, latencies)
+    summary['dropped'] = pipeline.frame_queue.dropped + pipeline.result_queue.dropped
+    return summary
+
+
+def summarize(frames, elapsed, latencies):
+    latencies = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        'frames': frames,
+        'seconds': round(elapsed, 3),
+        'fps': round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+        'latency_ms_mean': round(float(latencies.mean()), 2),
+        'latency_ms_p50': round(float(np.percentile(latencies, 50)), 2),
+        'latency_ms_p95': round(float(np.percentile(latencies, 95)), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Обработка записанного видео без дрона и без окна')
+    parser.add_argument('--source', required=True, help='видеофайл или папка с изображениями')
+    parser.add_argument('--fps', type=float, default=30.0, help='частота кадров для папки с изображениями')
+    parser.add_argument('--max-frames', type=int, default=None)
+    parser.add_argument('--face-backend', default='haar', choices=('haar', 'dnn', 'mediapipe'))
+    parser.add_argument('--face-interval', type=int, default=None,
+                        help=f'запускать детектор лиц раз в N кадров без подстройки '
+                             f'(по умолчанию {OFFLINE_FACE_INTERVAL} без --realtime, иначе подстройка)')
+    parser.add_argument('--realtime', action='store_true', help='подавать кадры с частотой источника через конвейер')
+    parser.add_argument('--speed', type=float, default=1.0, help='ускорение воспроизведения в режиме --realtime')
+    parser.add_argument('--output', help='файл JSONL с результатами по кадрам')
+    parser.add_argument('--record', help='записать размеченное видео в MP4 (с индексом кадров .index.csv)')
+    parser.add_argument('--fake-tello', action='store_true', help='отправлять команды жестов на эмулятор Tello')
+    parser.add_argument('--latency', type=float, default=0.02, help='задержка ответа эмулятора, с')
+    parser.add_argument('--hand-roi', action='store_true', help='искать руки в области вокруг прошлых рук и лиц')
+    parser.add_argument('--workers', type=int, default=0, help='процессов для MediaPipe Hands (0 - без пула)')
+    parser.add_argument('--profile', help='сохранить время стадий обработки (.json или .csv)')
+    args = parser.parse_args(argv)
+
+    source = open_source(args.source, args.fps)
+    profiler = StageProfiler(enabled=bool(args.profile))
+    # Без --realtime расписание детектора лиц фиксировано, чтобы результат не зависел от скорости машины
+    face_interval = args.face_interval
+    if face_interval is None and not args.realtime:
+        face_interval = OFFLINE_FACE_INTERVAL
+    if args.workers:
+        from inference import PooledFrameProcessor
+        processor = PooledFrameProcessor(args.face_backend, profiler=profiler, workers=args.workers,
+                                         face_interval=face_interval)
+    else:
+        processor = FrameProcessor(args.face_backend, profiler=profiler, hand_roi=args.hand_roi,
+                                   face_interval=face_interval)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+
+    recorder = None
+    if args.record:
+        from recording import VideoRecorder
+        recorder = VideoRecorder(args.record, fps=source.fps)
+        recorder.start()
+
+    fake = commander = None
+    if args.fake_tello:
+        from fake_tello import FakeTello
+        fake = FakeTello(latency=args.latency)
+        fake.start()
+        tello = fake.create_client()
+        tello.connect()
+        commander = GestureCommander(tello)
+        commander.start()
+
+    def on_result(result):
+        if output is not None:
+            output.write(json.dumps(result_record(result), ensure_ascii=False) + '\n')
+        if recorder is not None:
+            recorder.submit(result.image, result.timestamp)
+        if commander is not None and result.gesture_event is not None:
+            commander.handle(result.gesture_event)
+
+    try:
+        run = run_realtime if args.realtime else run_offline
+        kwargs = {'speed': args.speed} if args.realtime else {}
+        summary = run(source, processor, args.max_frames, on_result, **kwargs)
+    finally:
+        source.close()
+        processor.close()
+        if output is not None:
+            output.close()
+        if recorder is not None:
+            recorder.stop()
+        if commander is not None:
+            commander.stop()
+        if fake is not None:
+            fake.stop()
+
+    if args.profile:
+        if args.profile.endswith('.csv'):
+            profiler.export_csv(args.profile)
+        else:
+            profiler.export_json(args.profile)
+
+    if recorder is not None:
+        summary['recorded'] = recorder.written
+        summary['record_dropped'] = recorder.dropped
+    if commander is not None:
+        summary['commands'] = commander.sent
+        summary['commands_finished'] = commander.finished
+        summary['commands_failed'] = commander.failed
+        summary['fake_tello_log'] = len(fake.log)
+    print(json.dumps(summary, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
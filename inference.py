@@ -0,0 +1,298 @@
+import collections
+import concurrent.futures
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from vision import HANDS_SETTINGS, FrameProcessor
+
+# MediaPipe Hands (и при необходимости детектор лиц) в пуле процессов.
+# Кадры передаются через разделяемую память, в процесс уходит только имя
+# блока и форма кадра; результаты выдаются строго в порядке номеров кадров.
+
+
+def degrade_levels(settings):
+    # Ступени облегчения от заданных настроек: меньшая модель, одна рука,
+    # затем уменьшенный вдвое кадр (точки MediaPipe нормированы, масштаб не важен)
+    levels = [dict(settings, scale=1.0)]
+    for change in ({'model_complexity': 0}, {'max_num_hands': 1}, {'scale': 0.5}):
+        level = dict(levels[-1], **change)
+        if level != levels[-1]:
+            levels.append(level)
+    return levels
+
+
+# Состояние процесса-обработчика
+_worker = {}
+
+
+def _init_worker(face_backend, face_scale):
+    import mediapipe as mp
+    from face_tracking import create_face_detector
+    cv2.setNumThreads(1)
+    _worker['mp_hands'] = mp.solutions.hands
+    _worker['hands'] = None
+    _worker['hands_key'] = None
+    _worker['blocks'] = {}
+    _worker['face_detector'] = create_face_detector(face_backend) if face_backend else None
+    _worker['face_scale'] = face_scale
+
+
+def _attach(name):
+    blocks = _worker['blocks']
+    block = blocks.get(name)
+    if block is None:
+        block = blocks[name] = shared_memory.SharedMemory(name=name)
+    return block
+
+
+def _hands_for(level):
+    # Hands пересоздается только при смене настроек
+    key = tuple(sorted(level.items()))
+    if _worker['hands_key'] != key:
+        if _worker['hands'] is not None:
+            _worker['hands'].close()
+        options = {k: v for k, v in level.items() if k != 'scale'}
+        _worker['hands'] = _worker['mp_hands'].Hands(**options)
+        _worker['hands_key'] = key
+    return _worker['hands']
+
+
+def _warmup(level):
+    _hands_for(level)
+    time.sleep(0.05)
+
+
+def _run_task(name, shape, frame_id, level):
+    start = time.perf_counter()
+    image = np.ndarray(shape, dtype=np.uint8, buffer=_attach(name).buf)
+    model = _hands_for(level)
+
+    small = image
+    if level['scale'] < 1.0:
+        small = cv2.resize(image, None, fx=level['scale'], fy=level['scale'], interpolation=cv2.INTER_AREA)
+    small.flags.writeable = False
+    results = model.process(small)
+    hands = [np.array([(p.x, p.y, p.z) for p in hand.landmark], dtype=np.float32)
+             for hand in results.multi_hand_landmarks or ()]
+
+    faces = None
+    detector = _worker['face_detector']
+    if detector is not None:
+        scale = _worker['face_scale']
+        small_rgb = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        small_gray = cv2.cvtColor(small_rgb, cv2.COLOR_RGB2GRAY)
+        faces = [tuple(int(v / scale) for v in box) for box in detector.detect(small_rgb, small_gray)]
+    return frame_id, hands, faces, time.perf_counter() - start
+
+
+class SharedFrameSlots:
+    # Блоки разделяемой памяти под кадры, которые сейчас в обработке.
+    # Блок возвращается в свободные, когда по кадру пришел результат.
+    def __init__(self, count):
+        self.count = count
+        self.shape = None
+        self.blocks = []
+        self.free = []
+
+    def acquire(self, shape):
+        if shape != self.shape:
+            if len(self.free) != len(self.blocks):
+                return None  # Размер кадра сменился, ждем завершения старых кадров
+            self.release_all()
+            size = int(np.prod(shape))
+            self.blocks = [shared_memory.SharedMemory(create=True, size=size) for _ in range(self.count)]
+            self.free = list(self.blocks)
+            self.shape = shape
+        return self.free.pop() if self.free else None
+
+    def release(self, block):
+        self.free.append(block)
+
+    def release_all(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+        self.free = []
+        self.shape = None
+
+
+class InferenceEngine:
+    # Пул процессов с MediaPipe Hands. Одновременно в обработке не больше
+    # workers кадров; если время обработки (медиана последних window кадров)
+    # превышает latency_budget, настройки облегчаются на одну ступень, а при
+    # запасе больше чем вдвое - возвращаются обратно.
+    def __init__(self, workers=None, hands_settings=None, face_backend=None, face_scale=0.5,
+                 latency_budget=0.05, window=30):
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.levels = degrade_levels(dict(HANDS_SETTINGS, **(hands_settings or {})))
+        self.level = 0
+        self.latency_budget = latency_budget
+        self.window = window
+        self.latencies = collections.deque(maxlen=window)
+        self.since_change = 0
+        self.slots = SharedFrameSlots(self.workers)
+        self.pending = collections.OrderedDict()  # frame_id -> (future, block)
+        self.error = None
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker, initargs=(face_backend, face_scale))
+        # Процессы запускаются и загружают MediaPipe заранее, в фоне
+        self.warmup = [self.executor.submit(_warmup, self.settings) for _ in range(self.workers)]
+
+    @property
+    def ready(self):
+        return all(future.done() for future in self.warmup)
+
+    def wait_ready(self, timeout=None):
+        concurrent.futures.wait(self.warmup, timeout)
+        return self.ready
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    @property
+    def in_flight(self):
+        return len(self.pending)
+
+    def has_capacity(self):
+        return self.ready and len(self.pending) < self.workers
+
+    def submit(self, frame_id, image):
+        # Копирует RGB-кадр в свободный блок и отдает его процессу; False, если все заняты
+        if not self.has_capacity():
+            return False
+        block = self.slots.acquire(image.shape)
+        if block is None:
+            return False
+        np.copyto(np.ndarray(image.shape, dtype=np.uint8, buffer=block.buf), image)
+        future = self.executor.submit(_run_task, block.name, image.shape, frame_id, self.settings)
+        self.pending[frame_id] = (future, block)
+        return True
+
+    def collect(self, timeout=0.0):
+        # Готовые результаты (frame_id, руки, лица) по порядку отправки кадров.
+        # Ждет не дольше timeout первый из ожидающих кадров.
+        ready = []
+        while self.pending:
+            frame_id, (future, block) = next(iter(self.pending.items()))
+            try:
+                frame_id, hands, faces, elapsed = future.result(timeout=timeout if not ready else 0)
+                self.adapt(elapsed)
+            except concurrent.futures.TimeoutError:
+                break
+            except Exception as e:
+                # Кадр без результата все равно выдается, чтобы не нарушить порядок
+                self.error = e
+                hands, faces = [], None
+            del self.pending[frame_id]
+            self.slots.release(block)
+            ready.append((frame_id, hands, faces))
+        return ready
+
+    def adapt(self, elapsed):
+        self.latencies.append(elapsed)
+        self.since_change += 1
+        if self.since_change < self.window:
+            return
+        median = float(np.median(self.latencies))
+        if median > self.latency_budget and self.level < len(self.levels) - 1:
+            self.set_level(self.level + 1)
+        elif median < self.latency_budget / 2 and self.level > 0:
+            self.set_level(self.level - 1)
+
+    def set_level(self, level):
+        self.level = level
+        self.latencies.clear()
+        self.since_change = 0
+
+    def close(self):
+        for future, _ in self.pending.values():
+            future.cancel()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.pending.clear()
+        self.slots.release_all()
+
+
+def array_to_landmarks(points):
+    # Точки руки из процесса обратно в формат MediaPipe для отрисовки
+    from mediapipe.framework.formats import landmark_pb2
+    hand = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z in points:
+        point = hand.landmark.add()
+        point.x, point.y, point.z = float(x), float(y), float(z)
+    return hand
+
+
+class PooledFrameProcessor(FrameProcessor):
+    # FrameProcessor, у которого поиск рук (и лиц, если задан pool_faces)
+    # вынесен в InferenceEngine. Работает конвейером: VisionPipeline отдает
+    # кадры через submit() и забирает готовые через collect().
+    pipelined = True
+
+    def __init__(self, face_backend='haar', profiler=None, hands_settings=None, workers=None,
+                 pool_faces=False, latency_budget=0.05, face_interval=None):
+        self.engine = InferenceEngine(workers, hands_settings, face_backend if pool_faces else None,
+                                      latency_budget=latency_budget)
+        # Буфер кадра занят, пока кадр в процессе, в очереди результатов и на экране.
+        # Руки ищутся в процессах, здесь MediaPipe нужен только для отрисовки
+        super().__init__(face_backend, buffer_count=self.engine.workers + 3, profiler=profiler,
+                         hands_settings=hands_settings, hands=False, face_interval=face_interval)
+        import mediapipe as mp
+        self.mp_hands = mp.solutions.hands
+        self.mp_draw = mp.solutions.drawing_utils
+        self.face_backend = face_backend
+        self.face_interval = face_interval
+        self.frames = {}
+
+    @property
+    def in_flight(self):
+        return self.engine.in_flight
+
+    def has_capacity(self):
+        return self.engine.has_capacity()
+
+    def wait_ready(self, timeout=None):
+        return self.engine.wait_ready(timeout)
+
+    def submit(self, frame):
+        if not self.engine.has_capacity():
+            return False
+        frame_rgb = self.prepare(frame)
+        if not self.engine.submit(frame.frame_id, frame_rgb):
+            return False
+        self.frames[frame.frame_id] = (frame, frame_rgb, time.perf_counter())
+        return True
+
+    def collect(self, timeout=0.0):
+        results = []
+        for frame_id, hands, faces in self.engine.collect(timeout):
+            frame, frame_rgb, submitted = self.frames.pop(frame_id)
+            self.profiler.record('hands', time.perf_counter() - submitted)
+            results.append(self.finish(frame, frame_rgb, [array_to_landmarks(points) for points in hands], faces))
+        return results
+
+    def process(self, frame):
+        # Синхронная обработка одного кадра (например, в headless.run_offline)
+        self.wait_ready()
+        if not self.submit(frame):
+            raise RuntimeError('Нет свободного обработчика: process() нельзя смешивать с submit()')
+        while True:
+            for result in self.collect(timeout=0.1):
+                if result.frame_id == frame.frame_id:
+                    return result
+
+    def fallback(self):
+        # Обработка в потоке конвейера, если пул процессов вышел из строя (BrokenProcessPool)
+        return FrameProcessor(self.face_backend, profiler=self.profiler, hands_settings=self.hands_settings,
+                              face_interval=self.face_interval)
+
+    def close(self):
+        super().close()
+        self.engine.close()
@@ -0,0 +1,227 @@
+import collections
+import threading
+import time
+
+from profiling import StageProfiler
+from vision import Frame
+
+
+class LatestQueue:
+    # Ограниченная очередь: при переполнении выбрасывается самый старый элемент,
+    # чтобы задержка не накапливалась
+    def __init__(self, maxsize=1):
+        self.maxsize = maxsize
+        self.items = collections.deque()
+        self.dropped = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def put(self, item):
+        with self.condition:
+            while len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        with self.condition:
+            if not self.items and not self.closed:
+                self.condition.wait(timeout)
+            if self.items:
+                return self.items.popleft()
+            return None
+
+    def get_nowait(self):
+        with self.condition:
+            if self.items:
+                return self.items.popleft()
+            return None
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+
+class StageStats:
+    # Частота кадров стадии по скользящему окну отметок времени
+    def __init__(self, window=1.0):
+        self.window = window
+        self.ticks = collections.deque()
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def tick(self):
+        now = time.monotonic()
+        with self.lock:
+            self.count += 1
+            self.ticks.append(now)
+            while self.ticks and now - self.ticks[0] > self.window:
+                self.ticks.popleft()
+
+    @property
+    def fps(self):
+        now = time.monotonic()
+        with self.lock:
+            while self.ticks and now - self.ticks[0] > self.window:
+                self.ticks.popleft()
+            return len(self.ticks) / self.window
+
+
+class VisionPipeline:
+    # Захват -> обработка -> отрисовка. Захват и обработка идут в своих потоках,
+    # отрисовка забирает последний результат из потока GUI через poll_result().
+    # read_frame возвращает изображение или пару (изображение, время захвата);
+    # кадры старше max_frame_age секунд не обрабатываются.
+    def __init__(self, read_frame, processor, queue_size=1, profiler=None, max_frame_age=None):
+        self.read_frame = read_frame
+        self.max_frame_age = max_frame_age
+        self.stale_dropped = 0
+        self.processor = processor
+        self.profiler = profiler if profiler is not None else StageProfiler()
+        self.frame_queue = LatestQueue(queue_size)
+        self.result_queue = LatestQueue(queue_size)
+        self.stats = {
+            'capture': StageStats(),
+            'inference': StageStats(),
+            'render': StageStats(),
+        }
+        self.frame_listeners = []
+        self.running = False
+        self.threads = []
+        self.error = None
+
+    def add_frame_listener(self, callback):
+        # callback(frame) вызывается из потока захвата для каждого нового кадра (до обработки)
+        self.frame_listeners.append(callback)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self.capture_loop, name='capture', daemon=True),
+            threading.Thread(target=self.run_inference, name='inference', daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def set_processor(self, processor):
+        # Замена процессора на ходу (например, когда модели загрузились в фоне).
+        # Старый процессор закрывается в потоке обработки, когда тот переключится на новый
+        previous = self.processor
+        self.processor = processor
+        if not self.running:
+            previous.close()
+
+    def stop(self):
+        self.running = False
+        self.frame_queue.close()
+        self.result_queue.close()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+        self.threads = []
+
+    def capture_loop(self):
+        last_image = None
+        frame_id = 0
+        while self.running:
+            start = time.perf_counter()
+            item = self.read_frame()
+            if isinstance(item, tuple):
+                image, captured_at = item
+            else:
+                image, captured_at = item, None
+            # Пока источник не выдал новый кадр, не дублируем предыдущий
+            if image is None or image is last_image:
+                time.sleep(0.001)
+                continue
+            self.profiler.record('capture', time.perf_counter() - start)
+            last_image = image
+            frame_id += 1
+            frame = Frame(frame_id, captured_at or time.monotonic(), image)
+            for callback in self.frame_listeners:
+                callback(frame)
+            self.frame_queue.put(frame)
+            self.stats['capture'].tick()
+
+    def run_inference(self):
+        while self.running:
+            processor = self.processor
+            # Процессор с пулом процессов (inference.PooledFrameProcessor) обрабатывает несколько кадров сразу
+            if getattr(processor, 'pipelined', False):
+                self.pooled_inference_loop(processor)
+            else:
+                self.inference_loop(processor)
+            if self.processor is not processor:
+                processor.close()
+
+    def inference_loop(self, processor):
+        while self.running and self.processor is processor:
+            frame = self.frame_queue.get(timeout=0.1)
+            if frame is None:
+                continue
+            if self.is_stale(frame):
+                continue
+            try:
+                result = processor.process(frame)
+            except Exception as e:
+                self.error = e
+                continue
+            self.result_queue.put(result)
+            self.stats['inference'].tick()
+
+    def pooled_inference_loop(self, processor):
+        while self.running and self.processor is processor:
+            # Пока процессы загружают модели, ждем их, а не опрашиваем в цикле
+            if not processor.wait_ready(0.1):
+                continue
+            if processor.has_capacity():
+                frame = self.frame_queue.get(timeout=0.002 if processor.in_flight else 0.1)
+                if frame is not None and not self.is_stale(frame):
+                    try:
+                        processor.submit(frame)
+                    except Exception as e:
+                        # Пул процессов сломан (упал процесс-обработчик) - дальше кадры
+                        # обрабатываются в этом потоке, старый процессор закроет run_inference
+                        self.error = e
+                        self.processor = processor.fallback()
+                        break
+            try:
+                results = processor.collect(timeout=0 if processor.has_capacity() else 0.01)
+            except Exception as e:
+                self.error = e
+                continue
+            for result in results:
+                self.result_queue.put(result)
+                self.stats['inference'].tick()
+
+    def is_stale(self, frame):
+        if self.max_frame_age is not None and time.monotonic() - frame.timestamp > self.max_frame_age:
+            self.stale_dropped += 1
+            return True
+        return False
+
+    def poll_result(self):
+        result = self.result_queue.get_nowait()
+        if result is not None:
+            self.stats['render'].tick()
+            # Задержка от захвата кадра до отрисовки
+            self.profiler.record('glass_to_glass', time.monotonic() - result.timestamp)
+        return result
+
+    def snapshot(self):
+        return {
+            'capture_fps': self.stats['capture'].fps,
+            'inference_fps': self.stats['inference'].fps,
+            'render_fps': self.stats['render'].fps,
+            'frame_queue': len(self.frame_queue),
+            'result_queue': len(self.result_queue),
+            'frame_dropped': self.frame_queue.dropped,
+            'result_dropped': self.result_queue.dropped,
+            'stale_dropped': self.stale_dropped,
+        }
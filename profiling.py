@@ -0,0 +1,95 @@
+import collections
+import csv
+import json
+import time
+
+import numpy as np
+
+
+class NullTimer:
+    # Заглушка для выключенного профилировщика: ничего не измеряет
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+class StageTimer:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StageProfiler:
+    # Время стадий обработки кадра в скользящем окне последних window замеров.
+    # Выключенный профилировщик возвращает общую заглушку и почти ничего не стоит:
+    #     with profiler.stage('faces'):
+    #         ...
+    def __init__(self, window=300, enabled=False):
+        self.window = window
+        self.enabled = enabled
+        self.samples = {}
+
+    def stage(self, name):
+        if not self.enabled:
+            return NULL_TIMER
+        return StageTimer(self, name)
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples.setdefault(name, collections.deque(maxlen=self.window))
+        samples.append(seconds)
+
+    def reset(self):
+        self.samples = {}
+
+    def summary(self):
+        # Время в миллисекундах: среднее и перцентили p50/p95/p99
+        result = {}
+        for name, samples in list(self.samples.items()):
+            values = np.array(samples) * 1000
+            if not len(values):
+                continue
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            result[name] = {
+                'count': len(values),
+                'mean': round(float(values.mean()), 3),
+                'p50': round(float(p50), 3),
+                'p95': round(float(p95), 3),
+                'p99': round(float(p99), 3),
+            }
+        return result
+
+    def hud_lines(self):
+        return [f'{name}: {stats["p50"]:.1f} / {stats["p95"]:.1f} / {stats["p99"]:.1f} мс'
+                for name, stats in self.summary().items()]
+
+    def export_json(self, path):
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.summary(), file, ensure_ascii=False, indent=2)
+
+    def export_csv(self, path):
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(('stage', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'))
+            for name, stats in self.summary().items():
+                writer.writerow((name, stats['count'], stats['mean'], stats['p50'], stats['p95'], stats['p99']))
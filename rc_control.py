@@ -0,0 +1,80 @@
+import time
+
+from PyQt5.QtCore import QObject, QTimer
+
+# Порядок осей совпадает с аргументами Tello.send_rc_control
+AXES = ('left_right', 'forward_backward', 'up_down', 'yaw')
+
+
+class RcController(QObject):
+    # Непрерывное управление скоростями: по таймеру с постоянной частотой
+    # отправляет send_rc_control. Источники ввода (клавиатура, кнопки, жесты)
+    # задают целевые скорости, фактическая скорость плавно к ним подтягивается.
+    # Если источник долго не обновлялся, его скорость считается нулевой.
+    def __init__(self, tello, rate_hz=30, acceleration=250, deadman_timeout=0.5, parent=None):
+        super().__init__(parent)
+        self.tello = tello
+        self.rate_hz = rate_hz
+        self.acceleration = acceleration
+        self.deadman_timeout = deadman_timeout
+        self.sources = {}
+        self.current = [0.0, 0.0, 0.0, 0.0]
+        self.last_sent = None
+        self.last_tick = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+
+    @property
+    def active(self):
+        return self.timer.isActive()
+
+    def start(self):
+        self.last_tick = time.monotonic()
+        self.timer.start(int(1000 / self.rate_hz))
+
+    def stop(self):
+        self.timer.stop()
+        self.sources.clear()
+        self.current = [0.0, 0.0, 0.0, 0.0]
+        self.send(0, 0, 0, 0)
+
+    def set_target(self, source, left_right=0, forward_backward=0, up_down=0, yaw=0, hold=False):
+        # hold=True - источник не истекает по таймауту (например, зажатая клавиша),
+        # пока его явно не сбросят через clear()
+        self.sources[source] = ((left_right, forward_backward, up_down, yaw), time.monotonic(), hold)
+
+    def clear(self, source=None):
+        if source is None:
+            self.sources.clear()
+        else:
+            self.sources.pop(source, None)
+
+    def target(self, now):
+        target = [0, 0, 0, 0]
+        for source, (velocities, timestamp, hold) in list(self.sources.items()):
+            if not hold and now - timestamp > self.deadman_timeout:
+                del self.sources[source]
+                continue
+            for i in range(4):
+                target[i] += velocities[i]
+        return [max(-100, min(100, value)) for value in target]
+
+    def tick(self):
+        now = time.monotonic()
+        dt = now - self.last_tick
+        self.last_tick = now
+
+        # Ограничиваем изменение скорости за такт
+        max_step = self.acceleration * dt
+        for i, value in enumerate(self.target(now)):
+            delta = value - self.current[i]
+            self.current[i] += max(-max_step, min(max_step, delta))
+
+        self.send(*(int(round(value)) for value in self.current))
+
+    def send(self, left_right, forward_backward, up_down, yaw):
+        try:
+            self.tello.send_rc_control(left_right, forward_backward, up_down, yaw)
+            self.last_sent = (left_right, forward_backward, up_down, yaw)
+        except Exception:
+            self.last_sent = None
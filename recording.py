@@ -0,0 +1,204 @@
+import csv
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from pipeline import LatestQueue
+from telemetry import STATE_FIELDS
+from vision import BufferPool
+
+# Запись и трансляция видео в отдельном потоке кодирования:
+#   MP4 через cv2.VideoWriter, UDP/RTSP/RTMP через процесс ffmpeg.
+# Рядом с MP4 пишется индекс <имя>.index.csv: время захвата каждого
+# записанного кадра и последний пакет телеметрии на тот момент.
+
+INDEX_FIELDS = ('frame', 'timestamp', 'wall_time', 'telemetry_seq', 'telemetry_timestamp') + STATE_FIELDS
+
+# Формат ffmpeg по схеме адреса
+STREAM_FORMATS = {
+    'udp': ['-f', 'mpegts'],
+    'rtsp': ['-f', 'rtsp', '-rtsp_transport', 'tcp'],
+    'rtmp': ['-f', 'flv'],
+}
+
+
+class Mp4Output:
+    def __init__(self, path, fps):
+        self.path = path
+        self.fps = fps
+        self.writer = None
+
+    def write(self, bgr):
+        if self.writer is None:
+            h, w = bgr.shape[:2]
+            self.writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*'mp4v'), self.fps, (w, h))
+            if not self.writer.isOpened():
+                raise IOError(f'Не удалось открыть файл для записи видео: {self.path}')
+        self.writer.write(bgr)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+class FfmpegOutput:
+    # Сырые BGR-кадры в stdin ffmpeg, на выходе H.264 с минимальной задержкой
+    def __init__(self, url, fps):
+        scheme = url.split('://', 1)[0]
+        if scheme not in STREAM_FORMATS:
+            raise ValueError(f'Неподдерживаемый адрес трансляции: {url}')
+        if shutil.which('ffmpeg') is None:
+            raise FileNotFoundError('Для трансляции нужен ffmpeg в PATH')
+        self.url = url
+        self.fps = fps
+        self.format = STREAM_FORMATS[scheme]
+        self.process = None
+
+    def write(self, bgr):
+        if self.process is None:
+            h, w = bgr.shape[:2]
+            command = ['ffmpeg', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+                       '-s', f'{w}x{h}', '-r', str(self.fps), '-i', '-',
+                       '-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'zerolatency',
+                       '-pix_fmt', 'yuv420p', '-g', str(int(self.fps))] + self.format + [self.url]
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        self.process.stdin.write(bgr.data)
+
+    def close(self):
+        if self.process is not None:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+            self.process.wait(timeout=5)
+            self.process = None
+
+
+class VideoRecorder:
+    # Кадры копируются при submit() в собственные буферы (буферы конвейера
+    # переиспользуются), а кодируются в отдельном потоке. Очередь ограничена:
+    # если кодирование не успевает, старые кадры выбрасываются, а захват и
+    # отрисовка не ждут. get_telemetry() возвращает последний TelemetrySnapshot.
+    def __init__(self, path=None, stream_url=None, fps=30.0, queue_size=8, get_telemetry=None, index_path=None):
+        if path is None and stream_url is None:
+            raise ValueError('Нужен файл для записи или адрес трансляции')
+        self.path = path
+        self.stream_url = stream_url
+        self.fps = fps
+        self.get_telemetry = get_telemetry
+        if index_path is None and path is not None:
+            index_path = os.path.splitext(path)[0] + '.index.csv'
+        self.index_path = index_path
+        self.outputs = []
+        if path is not None:
+            self.outputs.append(Mp4Output(path, fps))
+        if stream_url is not None:
+            self.outputs.append(FfmpegOutput(stream_url, fps))
+        self.queue = LatestQueue(queue_size)
+        # Буфер занят, пока кадр в очереди или кодируется
+        self.pool = BufferPool(queue_size + 2)
+        self.written = 0
+        self.error = None
+        self.running = False
+        self.thread = None
+        self.index_file = None
+        self.index_writer = None
+
+    @property
+    def dropped(self):
+        return self.queue.dropped
+
+    def start(self):
+        if self.running:
+            return
+        if self.index_path is not None:
+            self.index_file = open(self.index_path, 'w', newline='', encoding='utf-8')
+            self.index_writer = csv.writer(self.index_file)
+            self.index_writer.writerow(INDEX_FIELDS)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='video-recorder', daemon=True)
+        self.thread.start()
+
+    def submit(self, image, timestamp, rgb=True):
+        # Вызывается из потока, отдающего кадры; timestamp - время захвата (time.monotonic)
+        if not self.running:
+            return False
+        buffer = self.pool.next(image.shape)
+        if rgb:
+            cv2.cvtColor(image, cv2.COLOR_RGB2BGR, dst=buffer)
+        else:
+            np.copyto(buffer, image)
+        snapshot = self.get_telemetry() if self.get_telemetry is not None else None
+        self.queue.put((buffer, timestamp, time.time(), snapshot))
+        return True
+
+    def stop(self):
+        # Оставшиеся в очереди кадры дописываются перед закрытием
+        self.running = False
+        self.queue.close()
+        if self.thread is not None:
+            self.thread.join(timeout=5.0)
+            self.thread = None
+        for output in self.outputs:
+            try:
+                output.close()
+            except Exception as e:
+                self.error = e
+        if self.index_file is not None:
+            self.index_file.close()
+            self.index_file = None
+
+    def run(self):
+        while True:
+            item = self.queue.get(timeout=0.1)
+            if item is None:
+                if not self.running:
+                    break
+                continue
+            bgr, timestamp, wall_time, snapshot = item
+            try:
+                for output in self.outputs:
+                    output.write(bgr)
+            except Exception as e:
+                self.error = e
+                self.running = False
+                break
+            if self.index_writer is not None:
+                self.write_index(timestamp, wall_time, snapshot)
+            self.written += 1
+
+    def write_index(self, timestamp, wall_time, snapshot):
+        row = [self.written, f'{timestamp:.6f}', f'{wall_time:.6f}']
+        if snapshot is not None and snapshot.seq:
+            row += [snapshot.seq, f'{snapshot.timestamp:.6f}']
+            row += ['' if np.isnan(value) else f'{value:g}' for value in snapshot.values]
+        else:
+            row += [''] * (2 + len(STATE_FIELDS))
+        self.index_writer.writerow(row)
+
+
+def load_index(path):
+    # Индекс записи в структурированный массив; отсутствующие значения - NaN
+    dtype = np.dtype([('frame', np.int64)] + [(name, np.float64) for name in INDEX_FIELDS[1:]])
+    with open(path, newline='', encoding='utf-8') as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        if tuple(header) != INDEX_FIELDS:
+            raise ValueError(f'Неизвестный формат индекса видео: {path}')
+        rows = [tuple(float(value) if value else np.nan for value in row) for row in reader]
+    index = np.zeros(len(rows), dtype=dtype)
+    for i, name in enumerate(INDEX_FIELDS):
+        index[name] = [row[i] for row in rows]
+    return index
+
+
+def telemetry_for_frames(index, recording):
+    # Для каждого кадра - последняя запись телеметрии (load_recording) не позже
+    # времени захвата кадра; -1, если телеметрии к тому моменту еще не было
+    return np.searchsorted(recording['timestamp'], index['timestamp'], side='right') - 1
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class StartupTimer:
+    # Отметки времени запуска от started (time.perf_counter в начале программы):
+    #     timer.mark('window_shown')
+    #     print(timer.report())
+    def __init__(self, started=None, target=None, target_mark='window_shown'):
+        self.started = time.perf_counter() if started is None else started
+        self.target = target
+        self.target_mark = target_mark
+        self.marks = []
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.started))
+
+    def elapsed(self, name):
+        for mark, seconds in self.marks:
+            if mark == name:
+                return seconds
+        return None
+
+    def within_target(self):
+        elapsed = self.elapsed(self.target_mark)
+        return self.target is None or (elapsed is not None and elapsed <= self.target)
+
+    def report(self):
+        lines = []
+        previous = 0.0
+        for name, seconds in self.marks:
+            lines.append(f'{name:20s} {seconds * 1000:8.1f} мс  (+{(seconds - previous) * 1000:.1f})')
+            previous = seconds
+        if self.target is not None:
+            elapsed = self.elapsed(self.target_mark)
+            status = 'в норме' if self.within_target() else 'ПРЕВЫШЕНО'
+            shown = f'{elapsed * 1000:.1f}' if elapsed is not None else '-'
+            lines.append(f'Цель {self.target_mark}: {shown} из {self.target * 1000:.0f} мс - {status}')
+        return '\n'.join(lines)
+
+
+class BackgroundLoader(QObject):
+    # Создает тяжелый объект (модели, детекторы) в отдельном потоке и передает
+    # его в поток GUI сигналом loaded; при ошибке - failed с текстом ошибки
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, factory, parent=None):
+        super().__init__(parent)
+        self.factory = factory
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='loader', daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            result = self.factory()
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.loaded.emit(result)
@@ -0,0 +1,203 @@
+import json
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+# Поля пакета состояния Tello (mid, x, y, z - только Tello EDU с ковриками)
+STATE_FIELDS = (
+    'pitch', 'roll', 'yaw',
+    'vgx', 'vgy', 'vgz',
+    'templ', 'temph',
+    'tof', 'h', 'bat', 'baro', 'time',
+    'agx', 'agy', 'agz',
+    'mid', 'x', 'y', 'z',
+)
+FIELD_INDEX = {name: i for i, name in enumerate(STATE_FIELDS)}
+
+
+class TelemetrySnapshot:
+    # Неизменяемый снимок одного пакета состояния. Отсутствующие поля - NaN
+    __slots__ = ('seq', 'timestamp', 'values')
+
+    def __init__(self, seq, timestamp, values):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.values = values
+
+    @classmethod
+    def from_state(cls, seq, timestamp, state):
+        values = np.full(len(STATE_FIELDS), np.nan)
+        for key, value in state.items():
+            index = FIELD_INDEX.get(key)
+            if index is not None:
+                values[index] = value
+        return cls(seq, timestamp, values)
+
+    def get(self, name):
+        return self.values[FIELD_INDEX[name]]
+
+
+EMPTY_SNAPSHOT = TelemetrySnapshot(0, 0.0, np.full(len(STATE_FIELDS), np.nan))
+
+
+class TelemetryMonitor:
+    # Сокет состояния занят djitellopy: он заменяет словарь состояния на новый
+    # при каждом пакете, поэтому новый пакет определяется по смене объекта.
+    # Снимок заменяется целиком, так что читать latest можно из любого потока.
+    def __init__(self, get_state, poll_interval=0.01):
+        self.get_state = get_state
+        self.poll_interval = poll_interval
+        self.latest = EMPTY_SNAPSHOT
+        self.listeners = []
+        self.running = False
+        self.thread = None
+
+    def add_listener(self, callback):
+        # callback(snapshot) вызывается из потока телеметрии на каждый пакет
+        self.listeners.append(callback)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='telemetry', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def run(self):
+        last_state = None
+        seq = 0
+        while self.running:
+            try:
+                state = self.get_state()
+            except Exception:
+                state = None
+            if state and state is not last_state:
+                last_state = state
+                seq += 1
+                snapshot = TelemetrySnapshot.from_state(seq, time.monotonic(), state)
+                self.latest = snapshot
+                for callback in self.listeners:
+                    callback(snapshot)
+            time.sleep(self.poll_interval)
+
+
+# Запись телеметрии: время захвата (monotonic), системное время и все поля состояния
+SAMPLE_DTYPE = np.dtype([('timestamp', '<f8'), ('wall_time', '<f8')] +
+                        [(name, '<f4') for name in STATE_FIELDS])
+
+RECORDING_MAGIC = b'TLM1'
+
+
+class TelemetryRingBuffer:
+    # Кольцевой буфер фиксированного размера. total - сколько записей добавлено
+    # за все время, по нему читатели забирают только новые записи через since()
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.samples = np.zeros(capacity, dtype=SAMPLE_DTYPE)
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def append(self, snapshot):
+        with self.lock:
+            self.samples[self.total % self.capacity] = (snapshot.timestamp, time.time(), *snapshot.values)
+            self.total += 1
+
+    def since(self, position):
+        # Записи, добавленные после position, и новая позиция.
+        # Если читатель отстал больше чем на capacity, старые записи потеряны.
+        with self.lock:
+            total = self.total
+            start = max(position, total - self.capacity)
+            if start >= total:
+                return self.samples[:0].copy(), total
+            indices = np.arange(start, total) % self.capacity
+            return self.samples[indices], total
+
+    def latest(self, count=None):
+        with self.lock:
+            total = self.total
+        if count is None:
+            count = self.capacity
+        return self.since(max(0, total - count))[0]
+
+
+class TelemetryRecorder:
+    # Пишет новые записи из кольцевого буфера на диск пачками в своем потоке.
+    # Формат: b'TLM1', длина JSON-заголовка (uint32), заголовок с описанием
+    # полей и затем записи SAMPLE_DTYPE подряд. Читается через load_recording().
+    def __init__(self, ring, path, flush_interval=1.0):
+        self.ring = ring
+        self.path = path
+        self.flush_interval = flush_interval
+        self.position = ring.total
+        self.written = 0
+        self.lost = 0
+        self.running = False
+        self.thread = None
+        self.file = None
+
+    def start(self):
+        if self.running:
+            return
+        self.file = open(self.path, 'wb')
+        header = json.dumps({'fields': SAMPLE_DTYPE.names,
+                             'descr': np.lib.format.dtype_to_descr(SAMPLE_DTYPE)}).encode('utf-8')
+        # Выравниваем начало данных на 16 байт для memmap
+        padding = (-(len(RECORDING_MAGIC) + 4 + len(header))) % 16
+        header += b' ' * padding
+        self.file.write(RECORDING_MAGIC)
+        self.file.write(struct.pack('<I', len(header)))
+        self.file.write(header)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='telemetry-recorder', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def run(self):
+        while self.running:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        with self.ring.lock:
+            total = self.ring.total
+        self.lost += max(0, total - self.ring.capacity - self.position)
+        samples, self.position = self.ring.since(self.position)
+        if len(samples):
+            self.file.write(samples.tobytes())
+            self.file.flush()
+            self.written += len(samples)
+
+
+def load_recording(path):
+    # Отображает запись телеметрии в память без чтения файла целиком
+    with open(path, 'rb') as file:
+        magic = file.read(len(RECORDING_MAGIC))
+        if magic != RECORDING_MAGIC:
+            raise ValueError(f'Неизвестный формат файла телеметрии: {path}')
+        header_length = struct.unpack('<I', file.read(4))[0]
+        header = json.loads(file.read(header_length).decode('utf-8'))
+    dtype = np.dtype([tuple(field) for field in header['descr']])
+    offset = len(RECORDING_MAGIC) + 4 + header_length
+    count = (os.path.getsize(path) - offset) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,))
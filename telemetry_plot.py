@@ -0,0 +1,99 @@
+import math
+
+from PyQt5.QtCore import QPointF
+from PyQt5.QtGui import QColor, QPainter, QPen, QPixmap
+from PyQt5.QtWidgets import QWidget
+
+# Поле телеметрии -> (подпись, минимум, максимум, цвет)
+PLOT_FIELDS = (
+    ('h', 'Высота', -50, 300, '#1f77b4'),
+    ('bat', 'Батарея', 0, 100, '#2ca02c'),
+    ('pitch', 'Наклон', -90, 90, '#d62728'),
+)
+
+
+class TelemetryPlot(QWidget):
+    # График телеметрии из кольцевого буфера. Рисуется на собственном холсте:
+    # при новых записях холст сдвигается влево и дорисовываются только новые
+    # отрезки, полная перерисовка нужна лишь при изменении размера.
+    def __init__(self, ring, fields=PLOT_FIELDS, step=3, parent=None):
+        super().__init__(parent)
+        self.ring = ring
+        self.fields = fields
+        self.step = step
+        self.position = ring.total
+        self.canvas = None
+        self.last_points = None
+        self.background = QColor('#ffffff')
+        self.setMinimumHeight(120)
+
+    def value_to_y(self, value, low, high):
+        height = self.canvas.height() - 1
+        ratio = (min(max(value, low), high) - low) / (high - low)
+        return height - ratio * height
+
+    def draw_samples(self, painter, samples, right):
+        # Последняя запись рисуется в точке right, предыдущие - левее с шагом step
+        count = len(samples)
+        for i in range(count):
+            x = right - (count - 1 - i) * self.step
+            points = []
+            for field, _, low, high, _ in self.fields:
+                value = float(samples[field][i])
+                points.append(None if math.isnan(value) else QPointF(x, self.value_to_y(value, low, high)))
+            if self.last_points is not None:
+                for (_, _, _, _, color), start, end in zip(self.fields, self.last_points, points):
+                    if start is not None and end is not None:
+                        painter.setPen(QPen(QColor(color), 1.5))
+                        painter.drawLine(start, end)
+            self.last_points = points
+
+    def redraw(self):
+        self.canvas = QPixmap(self.size())
+        self.canvas.fill(self.background)
+        self.last_points = None
+        samples = self.ring.latest(self.width() // self.step + 1)
+        self.position = self.ring.total
+        painter = QPainter(self.canvas)
+        painter.setRenderHint(QPainter.Antialiasing)
+        self.draw_samples(painter, samples, self.width() - 1)
+        painter.end()
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        if self.canvas is None or self.canvas.size() != self.size():
+            self.redraw()
+            self.update()
+            return
+
+        samples, self.position = self.ring.since(self.position)
+        if not len(samples):
+            return
+
+        shift = len(samples) * self.step
+        if shift >= self.width():
+            self.redraw()
+        else:
+            self.canvas.scroll(-shift, 0, self.canvas.rect())
+            painter = QPainter(self.canvas)
+            painter.fillRect(self.width() - shift, 0, shift, self.height(), self.background)
+            painter.setRenderHint(QPainter.Antialiasing)
+            # Предыдущие точки уехали влево вместе с холстом
+            if self.last_points is not None:
+                self.last_points = [None if point is None else QPointF(point.x() - shift, point.y())
+                                    for point in self.last_points]
+            self.draw_samples(painter, samples, self.width() - 1)
+            painter.end()
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if self.canvas is not None:
+            painter.drawPixmap(0, 0, self.canvas)
+        x = 6
+        for _, title, _, _, color in self.fields:
+            painter.setPen(QColor(color))
+            painter.drawText(x, 14, title)
+            x += painter.fontMetrics().width(title) + 12
+        painter.end()
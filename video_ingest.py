@@ -0,0 +1,207 @@
+import collections
+import os
+import socket
+import threading
+import time
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class VideoFileSource:
+    # Кадры из видеофайла (BGR). read() возвращает None в конце файла
+    def __init__(self, path):
+        self.capture = cv2.VideoCapture(path)
+        if not self.capture.isOpened():
+            raise IOError(f'Не удалось открыть видео: {path}')
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def read(self):
+        ok, image = self.capture.read()
+        return image if ok else None
+
+    def close(self):
+        self.capture.release()
+
+
+class ImageDirectorySource:
+    # Кадры из папки с изображениями в порядке имен файлов
+    def __init__(self, path, fps=30.0):
+        self.files = sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+        if not self.files:
+            raise IOError(f'В папке нет изображений: {path}')
+        self.fps = fps
+        self.index = 0
+
+    def read(self):
+        if self.index >= len(self.files):
+            return None
+        image = cv2.imread(self.files[self.index])
+        self.index += 1
+        return image
+
+    def close(self):
+        pass
+
+
+def open_source(path, fps=30.0):
+    if os.path.isdir(path):
+        return ImageDirectorySource(path, fps)
+    return VideoFileSource(path)
+
+
+class TelloFrameSource:
+    # Кадры из фонового чтения djitellopy (PyAV с буферизацией по умолчанию).
+    # Время захвата djitellopy не сообщает, поэтому берется момент чтения.
+    # djitellopy отдает RGB, а конвейер, как и UdpH264Source, работает с BGR:
+    # каждый новый кадр переводится в BGR один раз
+    def __init__(self, tello):
+        self.frame_read = tello.get_frame_read()
+        self.last_image = None
+        self.image = None
+        self.timestamp = 0.0
+
+    def read_timed(self):
+        image = self.frame_read.frame
+        if image is not self.last_image:
+            self.last_image = image
+            self.image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR) if image is not None else None
+            self.timestamp = time.monotonic()
+        return self.image, self.timestamp
+
+    def close(self):
+        self.frame_read.stop()
+
+
+class UdpH264Source:
+    # Прием H.264 с UDP-порта Tello и декодирование PyAV с минимальной задержкой:
+    # флаг low_delay, многопоточное декодирование по срезам, без буфера кадров.
+    # При отставании декодер пропускает неопорные кадры, а при большом
+    # отставании пакеты отбрасываются до следующего ключевого кадра.
+    # В RGB/BGR переводится только последний кадр и только когда его забирают.
+    def __init__(self, port=11111, host='0.0.0.0', thread_count=0, thread_type='SLICE',
+                 max_backlog=4, drop_backlog=16):
+        import av
+        self.av = av
+        self.address = (host, port)
+        # Парсер работает в потоке приема, декодер - в потоке декодирования,
+        # поэтому у каждого свой контекст
+        self.parser = av.CodecContext.create('h264', 'r')
+        self.codec = av.CodecContext.create('h264', 'r')
+        self.codec.flags |= av.codec.context.Flags.low_delay
+        self.codec.flags2 |= av.codec.context.Flags2.fast
+        self.codec.thread_type = thread_type
+        self.codec.thread_count = thread_count
+        self.max_backlog = max_backlog
+        self.drop_backlog = drop_backlog
+        self.packets = collections.deque()
+        self.condition = threading.Condition()
+        self.latest = None
+        self.latest_image = None
+        self.frame_id = 0
+        self.decoded = 0
+        self.skipped = 0
+        self.dropped_packets = 0
+        self.running = False
+        self.threads = []
+        self.socket = None
+
+    def start(self):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self.socket.bind(self.address)
+        self.socket.settimeout(0.2)
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self.receive_loop, name='video-receive', daemon=True),
+            threading.Thread(target=self.decode_loop, name='video-decode', daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def close(self):
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+        self.threads = []
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+    def receive_loop(self):
+        # Датаграммы собираются в пакеты H.264 парсером; время захвата пакета -
+        # момент приема его последнего фрагмента
+        while self.running:
+            try:
+                data = self.socket.recv(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            received_at = time.monotonic()
+            try:
+                packets = self.parser.parse(data)
+            except self.av.error.FFmpegError:
+                continue
+            if packets:
+                with self.condition:
+                    for packet in packets:
+                        self.packets.append((packet, received_at))
+                    self.condition.notify()
+
+    def next_packet(self):
+        with self.condition:
+            while self.running and not self.packets:
+                self.condition.wait(0.2)
+            if not self.packets:
+                return None, None, 0
+
+            # Сильное отставание: отбрасываем все до последнего ключевого кадра
+            if len(self.packets) > self.drop_backlog:
+                keyframes = [i for i, (packet, _) in enumerate(self.packets) if packet.is_keyframe]
+                if keyframes:
+                    for _ in range(keyframes[-1]):
+                        self.packets.popleft()
+                        self.dropped_packets += 1
+            packet, received_at = self.packets.popleft()
+            return packet, received_at, len(self.packets)
+
+    def decode_loop(self):
+        while self.running:
+            packet, received_at, backlog = self.next_packet()
+            if packet is None:
+                continue
+            self.codec.skip_frame = 'NONREF' if backlog > self.max_backlog else 'DEFAULT'
+            try:
+                frames = self.codec.decode(packet)
+            except self.av.error.FFmpegError:
+                continue
+            for frame in frames:
+                self.decoded += 1
+                with self.condition:
+                    if self.latest is not None and self.latest[0] is not None:
+                        self.skipped += 1
+                    self.frame_id += 1
+                    self.latest = (frame, received_at, self.frame_id)
+
+    def read_timed(self):
+        # Последний декодированный кадр (BGR) и время его захвата
+        with self.condition:
+            latest = self.latest
+            if latest is None:
+                return self.latest_image
+            frame, received_at, frame_id = latest
+            if frame is None:
+                return self.latest_image
+            self.latest = (None, received_at, frame_id)
+        self.latest_image = (frame.to_ndarray(format='bgr24'), received_at)
+        return self.latest_image
+
+    def read(self):
+        item = self.read_timed()
+        return None if item is None else item[0]
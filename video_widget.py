@@ -0,0 +1,58 @@
+import cv2
+import numpy as np
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QImage, QPainter
+from PyQt5.QtWidgets import QLabel, QSizePolicy
+
+
+class VideoLabel(QLabel):
+    # Кадр масштабируется один раз сразу в размер метки в постоянный буфер,
+    # QImage ссылается на этот буфер без копирования и рисуется в paintEvent
+    clicked = pyqtSignal(float, float)  # точка щелчка в долях кадра
+
+    def __init__(self, text=''):
+        super().__init__(text)
+        self.setAlignment(Qt.AlignCenter)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setMinimumSize(320, 240)
+        self.buffer = None
+        self.image = None
+        self.hud_lines = []
+
+    def set_frame(self, frame_rgb):
+        h, w = frame_rgb.shape[:2]
+        scale = min(self.width() / w, self.height() / h)
+        size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        if self.buffer is None or self.buffer.shape[:2] != size[::-1]:
+            self.buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            self.image = QImage(self.buffer.data, size[0], size[1], size[0] * 3, QImage.Format_RGB888)
+        cv2.resize(frame_rgb, size, dst=self.buffer, interpolation=cv2.INTER_LINEAR)
+        self.update()
+
+    def paintEvent(self, event):
+        if self.image is None:
+            super().paintEvent(event)
+            return
+        painter = QPainter(self)
+        x = (self.width() - self.image.width()) // 2
+        y = (self.height() - self.image.height()) // 2
+        painter.drawImage(x, y, self.image)
+        if self.hud_lines:
+            self.draw_hud(painter, x, y)
+        painter.end()
+
+    def mousePressEvent(self, event):
+        if self.image is not None:
+            x = (event.x() - (self.width() - self.image.width()) // 2) / self.image.width()
+            y = (event.y() - (self.height() - self.image.height()) // 2) / self.image.height()
+            if 0 <= x <= 1 and 0 <= y <= 1:
+                self.clicked.emit(x, y)
+        super().mousePressEvent(event)
+
+    def draw_hud(self, painter, x, y):
+        line_height = painter.fontMetrics().height()
+        width = max(painter.fontMetrics().width(line) for line in self.hud_lines) + 12
+        painter.fillRect(x + 4, y + 4, width, line_height * len(self.hud_lines) + 8, QColor(0, 0, 0, 160))
+        painter.setPen(QColor(255, 255, 255))
+        for i, line in enumerate(self.hud_lines):
+            painter.drawText(x + 10, y + 8 + line_height * (i + 1) - painter.fontMetrics().descent(), line)
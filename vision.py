@@ -0,0 +1,169 @@
+import time
+import cv2
+import numpy as np
+
+from face_tracking import FaceTracker, create_face_detector
+from hand_tracking import HandTracker
+from gestures import GestureFilter, classify_gesture, landmarks_to_array
+from profiling import StageProfiler
+
+# Параметры MediaPipe Hands по умолчанию (как у mp.solutions.hands.Hands())
+HANDS_SETTINGS = {
+    'model_complexity': 1,
+    'max_num_hands': 2,
+    'min_detection_confidence': 0.5,
+    'min_tracking_confidence': 0.5,
+}
+
+
+class Frame:
+    # Кадр с номером и временем захвата (time.monotonic)
+    __slots__ = ('frame_id', 'timestamp', 'image')
+
+    def __init__(self, frame_id, timestamp, image):
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.image = image
+
+
+class BufferPool:
+    # Заранее выделенные буферы, выдаваемые по кругу. Буфер переиспользуется
+    # через count выдач, поэтому count должен быть больше числа кадров,
+    # которые одновременно могут находиться в очередях и у потребителя
+    def __init__(self, count=3):
+        self.count = count
+        self.buffers = []
+        self.index = 0
+
+    def next(self, shape, dtype=np.uint8):
+        if not self.buffers or self.buffers[0].shape != shape or self.buffers[0].dtype != dtype:
+            self.buffers = [np.empty(shape, dtype=dtype) for _ in range(self.count)]
+            self.index = 0
+        buffer = self.buffers[self.index]
+        self.index = (self.index + 1) % self.count
+        return buffer
+
+
+class ProcessResult:
+    # Результат обработки кадра: размеченное RGB-изображение, лица и жест.
+    # gesture - текущий устойчивый жест, gesture_event - жест, только что
+    # подтвержденный фильтром (по нему отправляется команда)
+    __slots__ = ('frame_id', 'timestamp', 'image', 'faces', 'gesture', 'gesture_event', 'processed_at')
+
+    def __init__(self, frame_id, timestamp, image, faces, gesture, gesture_event):
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.image = image
+        self.faces = faces
+        self.gesture = gesture
+        self.gesture_event = gesture_event
+        self.processed_at = time.monotonic()
+
+
+class FrameProcessor:
+    # Распознавание лиц и жестов без привязки к Qt, чтобы работать в отдельном потоке.
+    # face_backend=None и hands=False выключают распознавание: модели не загружаются,
+    # кадр только переводится в RGB. face_interval фиксирует расписание детектора лиц (см. FaceTracker)
+    def __init__(self, face_backend='haar', buffer_count=3, profiler=None, hands_settings=None, hand_roi=False,
+                 hands=True, face_interval=None):
+        self.profiler = profiler if profiler is not None else StageProfiler()
+
+        # Распознавание лиц: детектор на уменьшенном кадре + слежение между запусками
+        self.face_tracker = None
+        if face_backend:
+            self.face_tracker = FaceTracker(create_face_detector(face_backend), interval=face_interval)
+
+        # Инициализация MediaPipe (импорт занимает заметное время, поэтому только при необходимости)
+        self.hands_settings = dict(HANDS_SETTINGS, **(hands_settings or {}))
+        self.hands = None
+        self.hand_tracker = None
+        if hands:
+            import mediapipe as mp
+            self.mp_hands = mp.solutions.hands
+            self.mp_draw = mp.solutions.drawing_utils
+            self.hands = self.mp_hands.Hands(**self.hands_settings)
+            # Поиск рук только в области вокруг прошлых рук и лиц (см. hand_tracking.py)
+            self.hand_tracker = HandTracker(self.hands) if hand_roi else None
+        self.gesture_filter = GestureFilter()
+
+        # Определяем цвет для обводки лиц
+        self.face_color = (255, 255, 255)
+
+        # RGB-кадры пишутся в переиспользуемые буферы: один и тот же буфер
+        # читают детекторы, MediaPipe и отрисовка
+        self.rgb_pool = BufferPool(buffer_count)
+
+    def process(self, frame):
+        frame_rgb = self.prepare(frame)
+
+        if self.hand_tracker is not None:
+            # Лица нужны до рук: вокруг них ищутся руки, пока рук нет
+            faces = []
+            if self.face_tracker is not None:
+                with self.profiler.stage('faces'):
+                    faces = self.face_tracker.update(frame_rgb)
+            with self.profiler.stage('hands'):
+                hands = self.hand_tracker.update(frame_rgb, faces)
+            return self.finish(frame, frame_rgb, hands, faces)
+
+        if self.hands is None:
+            return self.finish(frame, frame_rgb, [])
+
+        # Обработка жестов рук. Буфер только для чтения - MediaPipe не копирует его
+        with self.profiler.stage('hands'):
+            frame_rgb.flags.writeable = False
+            try:
+                results = self.hands.process(frame_rgb)
+            finally:
+                # Буфер из пула: иначе после ошибки в него нельзя будет писать следующие кадры
+                frame_rgb.flags.writeable = True
+
+        return self.finish(frame, frame_rgb, results.multi_hand_landmarks or [])
+
+    def prepare(self, frame):
+        with self.profiler.stage('convert'):
+            frame_rgb = self.rgb_pool.next(frame.image.shape)
+            cv2.cvtColor(frame.image, cv2.COLOR_BGR2RGB, dst=frame_rgb)
+        return frame_rgb
+
+    def finish(self, frame, frame_rgb, hands, faces=None):
+        # Лица, жесты и отрисовка по уже найденным рукам. faces передаются,
+        # если лица найдены в другом месте (например, в процессах InferenceEngine)
+        profiler = self.profiler
+        if faces is None:
+            faces = []
+            if self.face_tracker is not None:
+                with profiler.stage('faces'):
+                    faces = self.face_tracker.update(frame_rgb)
+
+        with profiler.stage('gestures'):
+            gesture = None
+            h, w = frame_rgb.shape[:2]
+            for hand_landmarks in hands:
+                gesture = classify_gesture(landmarks_to_array(hand_landmarks), aspect=w / h)
+                if gesture is not None:
+                    break
+
+            # Команда отправляется только при подтвержденной смене жеста
+            gesture_event = self.gesture_filter.update(gesture, frame.timestamp)
+
+        with profiler.stage('drawing'):
+            for hand_landmarks in hands:
+                self.mp_draw.draw_landmarks(frame_rgb, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
+
+            # Обводим лица
+            for (x, y, w, h) in faces:
+                cv2.rectangle(frame_rgb, (x, y), (x + w, y + h), self.face_color, 2)
+                cv2.putText(frame_rgb, 'Лицо', (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, self.face_color, 2)
+
+        return ProcessResult(frame.frame_id, frame.timestamp, frame_rgb, faces,
+                             self.gesture_filter.state, gesture_event)
+
+    def wait_ready(self, timeout=None):
+        # Готовность к обработке (PooledFrameProcessor ждет запуска процессов)
+        return True
+
+    def close(self):
+        if self.hands is not None:
+            self.hands.close()
+            self.hands = None